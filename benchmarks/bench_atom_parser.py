@@ -0,0 +1,110 @@
+"""Compare the streaming Atom parser with the original whole-document parser.
+
+Run from the repository root:
+
+    python benchmarks/bench_atom_parser.py
+
+Synthetic arXiv-shaped feeds of 1k and 10k entries are parsed from 64 KiB
+chunks. Reports the best wall time of a few runs and the peak memory
+allocated while parsing (tracemalloc).
+"""
+import os
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from paper_summarizer import iter_papers  # noqa: E402
+from paper_summarizer.settings import ARXIV_CHUNK_SIZE  # noqa: E402
+
+SIZES = (1000, 10000)
+REPEAT = 3
+
+ENTRY = """
+  <entry>
+    <id>http://arxiv.org/abs/2401.{n:05d}v1</id>
+    <updated>2024-01-15T18:59:59Z</updated>
+    <published>2024-01-15T18:59:59Z</published>
+    <title>A Study of Benchmark Entry {n}:
+  Scaling Parsers to Large Feeds</title>
+    <summary>  We study entry {n}. Large language models have shown remarkable
+capabilities across many tasks, yet their behaviour on long documents is
+poorly understood. We propose a method that improves accuracy while reducing
+compute, and evaluate it on several public benchmarks with strong results.
+</summary>
+    <author><name>Alice Example</name></author>
+    <author><name>Bob Example</name></author>
+    <author><name>Carol Example</name></author>
+    <arxiv:comment xmlns:arxiv="http://arxiv.org/schemas/atom">12 pages, 4 figures</arxiv:comment>
+    <link href="http://arxiv.org/abs/2401.{n:05d}v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/2401.{n:05d}v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.CL" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>"""
+
+
+def make_feed(entries):
+    body = "".join(ENTRY.format(n=n) for n in range(entries))
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        '  <title type="html">ArXiv Query: benchmark</title>\n'
+        f'{body}\n</feed>\n'
+    ).encode("utf-8")
+
+
+def chunked(data, size=ARXIV_CHUNK_SIZE):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+def parse_whole_document(chunks):
+    """The original scrape_papers() parser: buffer the response, then findall/find"""
+    root = ET.fromstring(b"".join(chunks))
+    ns = {'atom': 'http://www.w3.org/2005/Atom'}
+    papers = []
+    for entry in root.findall('atom:entry', ns):
+        published = entry.find('atom:published', ns)
+        papers.append({
+            'title': entry.find('atom:title', ns).text.strip().replace('\n', ' '),
+            'authors': [author.find('atom:name', ns).text for author in entry.findall('atom:author', ns)],
+            'summary': entry.find('atom:summary', ns).text.strip().replace('\n', ' '),
+            'arxiv_id': entry.find('atom:id', ns).text,
+            'published': published.text[:10] if published is not None else "Unknown"
+        })
+    return papers
+
+
+def parse_streaming(chunks):
+    """Consume the streaming parser without keeping the records"""
+    count = 0
+    for _ in iter_papers(chunks):
+        count += 1
+    return count
+
+
+def measure(parse, feed):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        parse(chunked(feed))
+        best = min(best, time.perf_counter() - start)
+    tracemalloc.start()
+    parse(chunked(feed))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    print(f"{'entries':>8} {'parser':<16} {'best time':>10} {'peak memory':>12}")
+    for entries in SIZES:
+        feed = make_feed(entries)
+        for name, parse in (("whole-document", parse_whole_document), ("streaming", parse_streaming)):
+            best, peak = measure(parse, feed)
+            print(f"{entries:>8} {name:<16} {best * 1000:>8.1f}ms {peak / 1024 / 1024:>10.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
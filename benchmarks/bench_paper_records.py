@@ -0,0 +1,84 @@
+"""Compare memory and pickle cost of per-paper dicts, Paper records and PaperBatch.
+
+Run from the repository root:
+
+    python benchmarks/bench_paper_records.py
+
+Builds 10k papers in each representation from the same field values, so the
+memory figures measure the container overhead (the strings are shared).
+The pickle figures are what st.cache_data pays to store and copy out a
+cached search result.
+"""
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from paper_summarizer import Paper, PaperBatch  # noqa: E402
+
+PAPERS = 10000
+REPEAT = 5
+
+
+def make_fields(count):
+    return [
+        (
+            f"A Study of Benchmark Entry {n}: Scaling Parsers to Large Feeds",
+            ("Alice Example", "Bob Example", "Carol Example"),
+            f"We study entry {n}. Large language models have shown remarkable capabilities "
+            "across many tasks, yet their behaviour on long documents is poorly understood.",
+            f"http://arxiv.org/abs/2401.{n:05d}v1",
+            "2024-01-15"
+        )
+        for n in range(count)
+    ]
+
+
+def as_dicts(fields):
+    """The original scrape_papers() result: a list of dicts"""
+    return [
+        {'title': title, 'authors': list(authors), 'summary': summary, 'arxiv_id': arxiv_id, 'published': published}
+        for title, authors, summary, arxiv_id, published in fields
+    ]
+
+
+def as_records(fields):
+    return [Paper(title, tuple(authors), summary, arxiv_id, published)
+            for title, authors, summary, arxiv_id, published in fields]
+
+
+def as_batch(fields):
+    return PaperBatch(Paper(title, tuple(authors), summary, arxiv_id, published)
+                      for title, authors, summary, arxiv_id, published in fields)
+
+
+def best_of(func):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    fields = make_fields(PAPERS)
+    print(f"{PAPERS} papers")
+    print(f"{'representation':<16} {'memory':>9} {'pickle size':>12} {'dumps':>9} {'loads':>9}")
+    for name, build in (("dicts", as_dicts), ("Paper records", as_records), ("PaperBatch", as_batch)):
+        tracemalloc.start()
+        papers = build(fields)
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        data = pickle.dumps(papers, protocol=pickle.HIGHEST_PROTOCOL)
+        dumps = best_of(lambda: pickle.dumps(papers, protocol=pickle.HIGHEST_PROTOCOL))
+        loads = best_of(lambda: pickle.loads(data))
+        print(f"{name:<16} {memory / 1024 / 1024:>7.2f}MB {len(data) / 1024 / 1024:>10.2f}MB "
+              f"{dumps * 1000:>7.1f}ms {loads * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
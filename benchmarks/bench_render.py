@@ -0,0 +1,70 @@
+"""Measure script time and page payload of a 10-paper result page.
+
+Run from the repository root:
+
+    python benchmarks/bench_render.py
+
+The app is driven with Streamlit's AppTest. Papers are served from a
+pre-filled local index and no API key is set, so nothing leaves the machine
+and the numbers cover rendering only. The payload is the number of markdown
+elements and the bytes of markup they carry to the browser on each rerun.
+"""
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+os.environ.setdefault("PAPER_SUMMARIZER_CACHE_DIR", tempfile.mkdtemp())
+os.environ.setdefault("ARXIV_API_URL", "http://127.0.0.1:9/api/query")  # background refreshes fail fast
+logging.disable(logging.WARNING)
+from streamlit.testing.v1 import AppTest  # noqa: E402
+from paper_summarizer import Paper, get_paper_store  # noqa: E402
+
+PAPERS = 10
+RUNS = 20
+
+
+def fill_index():
+    get_paper_store().add([
+        Paper(
+            f"Benchmark Paper {n}: Rendering Large Result Pages",
+            ("Alice Example", "Bob Example", "Carol Example", "Dave Example"),
+            f"Benchmark abstract {n}. Large language models have shown remarkable capabilities "
+            "across many tasks, yet their behaviour on long documents is poorly understood.",
+            f"http://arxiv.org/abs/2401.{n:05d}v1",
+            "2024-01-15"
+        )
+        for n in range(PAPERS)
+    ], "benchmark")
+
+
+def main():
+    fill_index()
+    app = AppTest.from_file(os.path.join(ROOT, "paperprecision.py"), default_timeout=60)
+    app.run()
+    next(slider for slider in app.slider if slider.label == "Papers to Analyze").set_value(PAPERS)
+    app.text_input[0].input("benchmark")
+
+    timings = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        app.button[0].click().run()
+        timings.append(time.perf_counter() - start)
+    assert not app.exception, app.exception
+
+    markup = [element.value for element in app.markdown]
+    print(f"{PAPERS}-paper result page, {RUNS} reruns")
+    print(f"script time      median {statistics.median(timings) * 1000:.1f}ms")
+    print(f"markdown elements {len(markup)}")
+    print(f"markup payload    {sum(len(value.encode('utf-8')) for value in markup) / 1024:.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
+    sys.stdout.flush()
+    # Don't wait for the background index refreshes queued by each search
+    os._exit(0)
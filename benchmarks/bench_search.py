@@ -0,0 +1,219 @@
+"""End-to-end search benchmark against a fixture arXiv feed and a fake LLM.
+
+Run from the repository root:
+
+    python benchmarks/bench_search.py           # compare with the stored baseline
+    python benchmarks/bench_search.py --save    # store these results as the baseline
+
+Each run fetches 1, 3 and 10 papers through search_papers() from a local
+server replaying fixtures/ and summarizes them through the concurrent
+summary pipeline against a local OpenAI-compatible server with the
+configured latency. Nothing leaves the machine. Rate limits are lifted so the numbers cover the code rather than
+arXiv's politeness delay, and every run uses fresh instructions so the
+summary cache never answers.
+
+Before timing anything, checks against a second fake arXiv server that
+sends ETags that a repeated query is revalidated: arXiv answers 304 Not
+Modified and the client replays the same papers. The timed runs use a
+server without validators, so every search is a full fetch.
+
+Reports the median search time, time to the first finished summary,
+end-to-end time and throughput, plus peak memory allocated during one run
+(tracemalloc). Exits with status 1 when a result is more than --tolerance
+worse than baselines/bench_search.json.
+
+Then times a 10-paper search through each search cache backend, as a miss
+that goes to the fake arXiv server and as a hit, with a local Redis
+stand-in behind the Redis backend. These figures are informational and not
+compared with the baseline.
+"""
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from fake_services import start_fake_arxiv, start_fake_redis, start_fake_services  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "baselines", "bench_search.json")
+SIZES = (1, 3, 10)
+TOPIC = "machine learning"
+MODEL = "anthropic/claude-3-haiku"
+INSTRUCTIONS = "You are an expert research analyst. Provide a clear, comprehensive summary under 100 words."
+LOWER_IS_BETTER = ("search_ms", "first_summary_ms", "end_to_end_ms", "peak_mb")
+run_ids = itertools.count()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="runs per size; the median is reported")
+    parser.add_argument("--arxiv-latency", type=float, default=0.2, help="seconds before the feed is sent")
+    parser.add_argument("--llm-first-token", type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument("--llm-per-token", type=float, default=0.002, help="seconds per generated token")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel summary requests")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    return parser.parse_args()
+
+
+def import_app(arxiv_url, llm_url):
+    os.environ["ARXIV_API_URL"] = arxiv_url
+    os.environ["OPENROUTER_BASE_URL"] = llm_url
+    # Settings are read on import; keep the caches out of the working tree
+    os.environ.setdefault("PAPER_SUMMARIZER_CACHE_DIR", tempfile.mkdtemp())
+    import paper_summarizer
+    limiters = paper_summarizer.get_rate_limiters()
+    limiters.update(
+        arxiv=paper_summarizer.RateLimiter(1000, 1000),
+        openrouter=paper_summarizer.RateLimiter(1000, 1000)
+    )
+    paper_summarizer.get_arxiv_client().rate_limiter = limiters['arxiv']
+    return paper_summarizer
+
+
+def check_revalidation(app):
+    """Fail unless a repeated query comes back as 304 Not Modified with the same papers"""
+    server = start_fake_arxiv()
+    client = app.ArxivClient(base_url=server.url)
+    params = app.arxiv_query_params(TOPIC, max_results=10)
+    first = list(app.iter_papers(client.stream(params)))
+    second = list(app.iter_papers(client.stream(params)))
+    assert client.not_modified == 1 and server.not_modified == 1, (client.not_modified, server.not_modified)
+    assert second == first and len(first) == 10, "revalidated feed differs from the original"
+    print(f"arXiv revalidation: repeat query answered 304, {len(second)} papers replayed\n")
+
+
+def search_once(app, papers_wanted, concurrency):
+    """One cold search: fetch and parse the feed, then summarize every paper"""
+    instructions = f"{INSTRUCTIONS} Benchmark run {next(run_ids)}."
+    start = time.perf_counter()
+    papers = app.search_papers(TOPIC, papers_wanted)
+    searched = time.perf_counter()
+    assert len(papers) == papers_wanted, f"expected {papers_wanted} papers, got {len(papers)}"
+
+    first_summary = None
+    for _, summary, done in app.summarize_papers_concurrently(papers, instructions, "sk-bench", MODEL, concurrency):
+        if done:
+            assert app.settings.SUMMARY_ERROR not in summary, summary
+            if first_summary is None:
+                first_summary = time.perf_counter()
+    finished = time.perf_counter()
+    return searched - start, first_summary - start, finished - start
+
+
+def measure(app, papers_wanted, args):
+    # Untimed, so loading the OpenAI SDK and opening the client don't land in the first run
+    search_once(app, papers_wanted, args.concurrency)
+    runs = [search_once(app, papers_wanted, args.concurrency) for _ in range(args.repeat)]
+    tracemalloc.start()
+    search_once(app, papers_wanted, args.concurrency)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    end_to_end = statistics.median(run[2] for run in runs)
+    return {
+        "search_ms": round(statistics.median(run[0] for run in runs) * 1000, 1),
+        "first_summary_ms": round(statistics.median(run[1] for run in runs) * 1000, 1),
+        "end_to_end_ms": round(end_to_end * 1000, 1),
+        "papers_per_s": round(papers_wanted / end_to_end, 2),
+        "peak_mb": round(peak / 1024 / 1024, 2)
+    }
+
+
+def measure_search_cache(app, redis_url, repeat):
+    """Median (miss, hit) milliseconds of a 10-paper search for each cache backend"""
+    backends = {
+        "memory": app.MemoryCacheBackend(),
+        "sqlite": app.SQLiteCacheBackend(os.path.join(tempfile.mkdtemp(), "searches.sqlite3")),
+        "redis": app.RedisCacheBackend(redis_url)
+    }
+    timings = {}
+    for name, backend in backends.items():
+        cache = app.SearchCache(backend)
+        misses, hits = [], []
+        for _ in range(repeat):
+            topic = f"{TOPIC} {next(run_ids)}"
+            start = time.perf_counter()
+            cache.search(topic, 10)
+            misses.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            cache.search(topic, 10)
+            hits.append(time.perf_counter() - start)
+        assert cache.hits == repeat and cache.errors == 0, cache.stats()
+        timings[name] = (statistics.median(misses) * 1000, statistics.median(hits) * 1000)
+    return timings
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every result that regressed against the baseline"""
+    regressions = []
+    for size, metrics in results.items():
+        for name, value in metrics.items():
+            before = baseline.get(size, {}).get(name)
+            if not before:
+                continue
+            change = (value - before) / before if name in LOWER_IS_BETTER else (before - value) / before
+            if change > tolerance:
+                regressions.append(f"{size} papers: {name} {before} -> {value} ({change:+.0%} worse)")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    arxiv, llm = start_fake_services(args.arxiv_latency, args.llm_first_token, args.llm_per_token,
+                                     arxiv_validators=False)
+    app = import_app(arxiv.url, llm.url)
+    check_revalidation(app)
+    config = {
+        "arxiv_latency": args.arxiv_latency,
+        "llm_first_token": args.llm_first_token,
+        "llm_per_token": args.llm_per_token,
+        "concurrency": args.concurrency
+    }
+
+    results = {}
+    print(f"{'papers':>6} {'search':>9} {'first summary':>14} {'end to end':>11} {'papers/s':>9} {'peak memory':>12}")
+    for size in SIZES:
+        metrics = results[str(size)] = measure(app, size, args)
+        print(f"{size:>6} {metrics['search_ms']:>7.1f}ms {metrics['first_summary_ms']:>12.1f}ms "
+              f"{metrics['end_to_end_ms']:>9.1f}ms {metrics['papers_per_s']:>9.2f} {metrics['peak_mb']:>10.2f}MB")
+
+    print(f"\n{'search cache':>12} {'miss':>9} {'hit':>9}")
+    for name, (miss, hit) in measure_search_cache(app, start_fake_redis().url, args.repeat).items():
+        print(f"{name:>12} {miss:>7.1f}ms {hit:>7.2f}ms")
+
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline saved to {os.path.relpath(BASELINE_PATH)}")
+        return 0
+
+    if not os.path.exists(BASELINE_PATH):
+        print("No baseline yet; run with --save to store one.")
+        return 0
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["config"] != config:
+        print(f"Baseline was recorded with {baseline['config']}; not comparing.")
+        return 0
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print(f"No regressions against the baseline (tolerance {args.tolerance:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    status = main()
+    sys.stdout.flush()
+    # Don't wait for keep-alive connections and worker threads at exit
+    os._exit(status)
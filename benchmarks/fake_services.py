@@ -0,0 +1,234 @@
+"""Local stand-ins for the arXiv API, an OpenAI-compatible endpoint and Redis.
+
+All three servers run on background threads on 127.0.0.1, so benchmarks
+need no network. Point the app at the arXiv and LLM servers before
+importing it:
+
+    arxiv, llm = start_fake_services(arxiv_latency=0.2, llm_first_token=0.3)
+    os.environ["ARXIV_API_URL"] = arxiv.url
+    os.environ["OPENROUTER_BASE_URL"] = llm.url
+
+The arXiv server replays an Atom feed from fixtures/, cut down to the
+requested max_results. Unless started with validators=False it sends an
+ETag with every feed and answers a matching If-None-Match with 304 Not
+Modified, like a server that supports conditional requests. The LLM server
+answers chat completions, plain or streamed, after a configurable time to
+first token plus a per-token delay, and answers batched prompts with the
+JSON reply the app asks for. The Redis server keeps strings in memory and
+speaks enough of the protocol for the search cache:
+
+    redis = start_fake_redis()
+    os.environ["PAPER_SUMMARIZER_SEARCH_CACHE"] = redis.url
+"""
+import hashlib
+import json
+import os
+import re
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_FEED = os.path.join(FIXTURES_DIR, "arxiv_machine_learning.xml")
+REPLY_WORDS = 60
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeArxivHandler(QuietHandler):
+    def do_GET(self):
+        server = self.server
+        time.sleep(server.latency)
+        query = parse_qs(urlparse(self.path).query)
+        max_results = int(query.get("max_results", ["10"])[0])
+        body = server.feed(max_results)
+        with server.lock:
+            server.requests += 1
+        if not server.validators:
+            self.send_body(body, "application/atom+xml; charset=utf-8")
+            return
+
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            with server.lock:
+                server.not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeArxivServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, feed_path=DEFAULT_FEED, latency=0.0, validators=True):
+        super().__init__(("127.0.0.1", 0), FakeArxivHandler)
+        with open(feed_path, encoding="utf-8") as f:
+            text = f.read()
+        first = text.index("  <entry>")
+        last = text.rindex("</entry>") + len("</entry>\n")
+        self._head, self._tail = text[:first], text[last:]
+        self._entries = re.findall(r"  <entry>.*?</entry>\n", text[first:last], re.S)
+        self.latency = latency
+        self.validators = validators
+        self.requests = 0
+        self.not_modified = 0
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_port}/api/query"
+
+    def feed(self, max_results):
+        """The recorded feed with at most max_results entries, repeating entries if it holds fewer"""
+        entries = [self._entries[i % len(self._entries)] for i in range(max_results)]
+        return (self._head + "".join(entries) + self._tail).encode("utf-8")
+
+
+class FakeLLMHandler(QuietHandler):
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][0]["content"]
+        with server.lock:
+            server.requests += 1
+        time.sleep(server.first_token)
+
+        batch_size = len(re.findall(r"^Paper \d+:$", prompt, re.M))
+        if batch_size:
+            words = json.dumps({"summaries": [
+                {"paper": n, "summary": " ".join(["analysis"] * REPLY_WORDS)}
+                for n in range(1, batch_size + 1)
+            ]}).split(" ")
+        else:
+            words = ["analysis"] * REPLY_WORDS
+        usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(words), "total_tokens": len(prompt) // 4 + len(words)}
+
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for word in words:
+                time.sleep(server.per_token)
+                self.send_event({"id": "fake", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                                 "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}]})
+            if body.get("stream_options", {}).get("include_usage"):
+                self.send_event({"id": "fake", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                                 "choices": [], "usage": usage})
+            self.send_chunk(b"data: [DONE]\n\n")
+            self.send_chunk(b"")
+            return
+
+        time.sleep(server.per_token * len(words))
+        self.send_body(json.dumps({
+            "id": "fake", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+            "usage": usage
+        }).encode("utf-8"), "application/json")
+
+    def send_event(self, data):
+        self.send_chunk(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+
+    def send_chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, first_token=0.0, per_token=0.0):
+        super().__init__(("127.0.0.1", 0), FakeLLMHandler)
+        self.first_token = first_token
+        self.per_token = per_token
+        self.requests = 0
+        self.lock = threading.Lock()
+        self.url = f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class FakeRedisHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.execute(args[0].upper().decode(), args[1:]))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeRedisHandler)
+        self.data = {}  # key -> (value, expires_at or None)
+        self.commands = 0
+        self.lock = threading.Lock()
+        self.url = f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def execute(self, command, args):
+        with self.lock:
+            self.commands += 1
+            if command in ("PING", "AUTH", "SELECT"):
+                return b"+OK\r\n" if command != "PING" else b"+PONG\r\n"
+            if command == "GET":
+                value, expires_at = self.data.get(args[0], (None, None))
+                if value is None or (expires_at is not None and expires_at < time.time()):
+                    return b"$-1\r\n"
+                return b"$%d\r\n%s\r\n" % (len(value), value)
+            if command == "SET":
+                expires_at = None
+                if len(args) >= 4 and args[2].upper() == b"PX":
+                    expires_at = time.time() + int(args[3]) / 1000
+                elif len(args) >= 4 and args[2].upper() == b"EX":
+                    expires_at = time.time() + int(args[3])
+                self.data[args[0]] = (args[1], expires_at)
+                return b"+OK\r\n"
+            if command == "FLUSHDB":
+                self.data.clear()
+                return b"+OK\r\n"
+            return b"-ERR unknown command '%s'\r\n" % command.encode()
+
+
+def start_fake_redis():
+    """Start the fake Redis server on a background thread and return it"""
+    server = FakeRedisServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_fake_arxiv(latency=0.0, feed_path=DEFAULT_FEED, validators=True):
+    """Start the fake arXiv server on a background thread and return it"""
+    server = FakeArxivServer(feed_path, latency, validators)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_fake_services(arxiv_latency=0.0, llm_first_token=0.0, llm_per_token=0.0, feed_path=DEFAULT_FEED,
+                        arxiv_validators=True):
+    """Start both fake servers on background threads and return them"""
+    servers = (FakeArxivServer(feed_path, arxiv_latency, arxiv_validators), FakeLLMServer(llm_first_token, llm_per_token))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    return servers
@@ -0,0 +1,39 @@
+"""Record an arXiv Atom feed as a benchmark fixture.
+
+Run from the repository root, with network access:
+
+    python benchmarks/record_fixtures.py "machine learning" 10
+
+Writes fixtures/arxiv_<topic>.xml with the raw response body for the same
+query search_papers() sends, so the fake arXiv server replays exactly what
+the API returned.
+"""
+import os
+import re
+import sys
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+from paper_summarizer import arxiv_query_params  # noqa: E402
+from paper_summarizer.settings import ARXIV_API_URL, ARXIV_TIMEOUT  # noqa: E402
+
+
+def main():
+    topic = sys.argv[1] if len(sys.argv) > 1 else "machine learning"
+    max_results = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    response = requests.get(ARXIV_API_URL, params=arxiv_query_params(topic, max_results=max_results),
+                            timeout=ARXIV_TIMEOUT)
+    response.raise_for_status()
+
+    path = os.path.join(HERE, "fixtures", f"arxiv_{re.sub(r'[^a-z0-9]+', '_', topic.lower()).strip('_')}.xml")
+    with open(path, "wb") as f:
+        f.write(response.content)
+    print(f"Recorded {response.content.count(b'<entry>')} entries to {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
+    sys.stdout.flush()
+    os._exit(0)
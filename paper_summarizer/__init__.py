@@ -0,0 +1,24 @@
+"""Fetch arXiv papers and summarize them with LLMs through OpenRouter.
+
+The core of the Streamlit app, importable without Streamlit. Run
+``python -m paper_summarizer --help`` for the command line and
+``python -m paper_summarizer.warmup --help`` for the scheduled cache warm-up.
+"""
+from .arxiv import (
+    ArxivClient, Paper, PaperBatch, PaperStore, arxiv_category_params, arxiv_query_params, get_arxiv_client,
+    get_paper_store, harvest_checkpoint_path, harvest_papers, iter_papers, iter_topic_papers, merge_topic_results,
+    normalize_topic, search_papers, search_topics
+)
+from .metrics import Metrics, get_metrics, start_metrics_server, timed
+from .resilience import (
+    CircuitBreaker, CircuitOpenError, RateLimiter, SingleFlight, get_circuit_breakers, get_rate_limiters,
+    get_single_flights
+)
+from .search_cache import (
+    MemoryCacheBackend, RedisCacheBackend, SearchCache, SQLiteCacheBackend, cached_search_papers, get_search_cache
+)
+from .summaries import (
+    SummaryCache, UsageLedger, api_key_fingerprint, get_connection_tracker, get_openrouter_client, get_summary_cache,
+    get_usage_ledger, hedged_summary, plan_summary_batches, stream_summary, summarize_paper, summarize_paper_with_usage,
+    summarize_papers_batched, summarize_papers_concurrently, summary_cache_key
+)
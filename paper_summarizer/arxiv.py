@@ -0,0 +1,492 @@
+"""arXiv API client, streaming Atom parser and local paper store"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import NamedTuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .metrics import get_metrics, timed
+from .resilience import get_circuit_breakers, get_rate_limiters, is_upstream_failure
+from .settings import (
+    ARXIV_API_URL, ARXIV_CHUNK_SIZE, ARXIV_MAX_RETRIES, ARXIV_RETRY_BACKOFF, ARXIV_TIMEOUT, ATOM_NS,
+    CACHE_DIR, HARVEST_MAX_RESULTS, HARVEST_PAGE_SIZE, HARVEST_RECHECK_AFTER, TOPIC_RANK_CONSTANT,
+    TOPIC_SEARCH_WORKERS
+)
+
+class ArxivClient:
+    """Keep-alive arXiv API client that revalidates repeat queries with conditional GETs"""
+    
+    def __init__(self, base_url=ARXIV_API_URL, timeout=ARXIV_TIMEOUT, max_validators=256,
+                 max_cached_bytes=1024 * 1024, rate_limiter=None, breaker=None):
+        self.base_url = base_url
+        self.rate_limiter = rate_limiter
+        self.breaker = breaker
+        self.timeout = timeout
+        self.max_validators = max_validators
+        self.max_cached_bytes = max_cached_bytes
+        self.requests = 0
+        self.not_modified = 0
+        self._validators = OrderedDict()  # url -> (etag, last_modified, content)
+        self._lock = threading.Lock()
+        
+        retry = Retry(
+            total=ARXIV_MAX_RETRIES,
+            backoff_factor=ARXIV_RETRY_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'paper-summarizer-app'
+        })
+    
+    def fetch(self, params):
+        """Return the raw Atom feed for a query"""
+        return b"".join(self.stream(params))
+    
+    def _get(self, url, headers):
+        """Start a streamed GET, reporting the outcome to the circuit breaker when there is one"""
+        if self.breaker is None:
+            return self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+        
+        started = time.monotonic()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.breaker.timeout(), stream=True)
+        except requests.RequestException as e:
+            if is_upstream_failure(e):
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(time.monotonic() - started)
+        return response
+    
+    def stream(self, params, chunk_size=ARXIV_CHUNK_SIZE):
+        """Yield the Atom feed for a query in chunks as it arrives.
+        
+        A feed fetched before is requested with If-None-Match/If-Modified-Since
+        and replayed from memory when arXiv answers 304 Not Modified. Only feeds
+        up to max_cached_bytes are kept for revalidation, so bulk pulls stream
+        through without being buffered.
+        """
+        url = requests.Request("GET", self.base_url, params=params).prepare().url
+        with self._lock:
+            cached = self._validators.get(url)
+        
+        headers = {}
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        
+        if self.breaker is not None:
+            self.breaker.allow()
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        with self._get(url, headers) as response:
+            not_modified = response.status_code == 304 and cached is not None
+            with self._lock:
+                self.requests += 1
+                if not_modified:
+                    self.not_modified += 1
+                    self._validators.move_to_end(url)
+            if not_modified:
+                yield cached[2]
+                return
+            response.raise_for_status()
+            
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            buffer = [] if etag or last_modified else None
+            buffered = 0
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if buffer is not None:
+                    buffered += len(chunk)
+                    if buffered <= self.max_cached_bytes:
+                        buffer.append(chunk)
+                    else:
+                        buffer = None
+                yield chunk
+        
+        if buffer is not None:
+            with self._lock:
+                self._validators[url] = (etag, last_modified, b"".join(buffer))
+                self._validators.move_to_end(url)
+                while len(self._validators) > self.max_validators:
+                    self._validators.popitem(last=False)
+
+@lru_cache(maxsize=None)
+def get_arxiv_client():
+    """arXiv client shared by all sessions"""
+    return ArxivClient(rate_limiter=get_rate_limiters()['arxiv'], breaker=get_circuit_breakers()['arxiv'])
+
+class Paper(NamedTuple):
+    """A single arXiv paper"""
+    title: str
+    authors: tuple
+    summary: str
+    arxiv_id: str
+    published: str
+
+class PaperBatch:
+    """Column-oriented sequence of papers.
+    
+    Each field is kept in its own list, so a batch pickles (and is copied out
+    of st.cache_data) as five flat lists instead of one object per paper.
+    Indexing and iteration produce Paper records.
+    """
+    __slots__ = Paper._fields
+    
+    def __init__(self, papers=()):
+        for field in Paper._fields:
+            setattr(self, field, [])
+        self.extend(papers)
+    
+    def append(self, paper):
+        for column, value in zip(self._columns(), paper):
+            column.append(value)
+    
+    def extend(self, papers):
+        for paper in papers:
+            self.append(paper)
+    
+    def _columns(self):
+        return (self.title, self.authors, self.summary, self.arxiv_id, self.published)
+    
+    def __len__(self):
+        return len(self.arxiv_id)
+    
+    def __iter__(self):
+        return map(Paper, *self._columns())
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PaperBatch(Paper(*row) for row in zip(*(column[index] for column in self._columns())))
+        return Paper(*(column[index] for column in self._columns()))
+
+def parse_entry(entry):
+    """Paper record for an Atom <entry> element"""
+    published = entry.find(f'{ATOM_NS}published')
+    return Paper(
+        title=entry.find(f'{ATOM_NS}title').text.strip().replace('\n', ' '),
+        authors=tuple(author.find(f'{ATOM_NS}name').text for author in entry.iterfind(f'{ATOM_NS}author')),
+        summary=entry.find(f'{ATOM_NS}summary').text.strip().replace('\n', ' '),
+        arxiv_id=entry.find(f'{ATOM_NS}id').text,
+        published=published.text[:10] if published is not None else "Unknown"
+    )
+
+def iter_papers(chunks):
+    """Incrementally parse an arXiv Atom feed from an iterable of byte chunks.
+    
+    Papers are yielded as soon as their <entry> is complete, while later bytes
+    are still arriving. Finished entries are detached from the tree, so memory
+    stays flat no matter how many entries the feed holds.
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    root = None
+    parse_time = 0.0
+    for chunk in chunks:
+        started = time.monotonic()
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == 'start':
+                if root is None:
+                    root = element
+            elif element.tag == f'{ATOM_NS}entry':
+                paper = parse_entry(element)
+                root.remove(element)
+                parse_time += time.monotonic() - started
+                yield paper
+                started = time.monotonic()
+        parse_time += time.monotonic() - started
+    parser.close()
+    get_metrics().observe('atom_parse', parse_time)
+
+def normalize_topic(topic):
+    """Topic with case and runs of whitespace folded, so equivalent searches share an entry"""
+    return " ".join(topic.lower().split())
+
+def arxiv_query_params(topic, start=0, max_results=10):
+    """arXiv API query parameters for a topic search"""
+    return {
+        'search_query': f'all:{topic}',
+        'start': start,
+        'max_results': max_results,
+        'sortBy': 'relevance',
+        'sortOrder': 'descending'
+    }
+
+def arxiv_category_params(category, start=0, max_results=10):
+    """arXiv API query parameters for the newest submissions to a category, such as cs.LG"""
+    return {
+        'search_query': f'cat:{category}',
+        'start': start,
+        'max_results': max_results,
+        'sortBy': 'submittedDate',
+        'sortOrder': 'descending'
+    }
+
+@timed('arxiv_search')
+def search_papers(topic, max_results=10):
+    """Most relevant arXiv papers for a topic, also added to the local paper store"""
+    try:
+        papers = PaperBatch(iter_papers(get_arxiv_client().stream(arxiv_query_params(topic, max_results=max_results))))
+    except Exception:
+        get_metrics().inc('arxiv_errors')
+        raise
+    get_paper_store().add(papers, topic)
+    return papers
+
+def merge_topic_results(results, rank_constant=TOPIC_RANK_CONSTANT):
+    """Merge the papers found for several topics into one ranked PaperBatch.
+    
+    Papers are deduplicated by arXiv ID and ranked by reciprocal rank fusion:
+    each topic a paper turns up in adds 1 / (rank_constant + rank), so papers
+    that several topics rank highly come first. Returns the merged papers and,
+    for each of them, the topics that found it.
+    """
+    scores, papers, topics = {}, {}, {}
+    for topic, batch in results.items():
+        for rank, paper in enumerate(batch, 1):
+            scores[paper.arxiv_id] = scores.get(paper.arxiv_id, 0.0) + 1 / (rank_constant + rank)
+            papers.setdefault(paper.arxiv_id, paper)
+            topics.setdefault(paper.arxiv_id, []).append(topic)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return PaperBatch(papers[arxiv_id] for arxiv_id in ranked), [tuple(topics[arxiv_id]) for arxiv_id in ranked]
+
+def search_topics(topics, max_results=10, search=search_papers, max_workers=TOPIC_SEARCH_WORKERS):
+    """Search several topics concurrently and merge the results.
+    
+    The arXiv rate limiter still spaces out the requests; the threads overlap
+    each feed's download and parsing with the wait for the next slot. Returns
+    the merged papers, the topics that found each one, and the error of every
+    topic whose search failed. The caller's trace gets the stage timings of
+    every search, summed over topics, and the wall time of the whole fan-out
+    as search_topics.
+    """
+    metrics = get_metrics()
+    traces = []
+    
+    def traced_search(topic):
+        # Traces are per thread, so each worker hands its timings back
+        with metrics.trace() as timings:
+            try:
+                return search(topic, max_results)
+            finally:
+                traces.append(timings)
+    
+    results, errors = {}, {}
+    with metrics.timer('search_topics'), ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {topic: executor.submit(traced_search, topic) for topic in topics}
+        for topic, future in futures.items():
+            try:
+                results[topic] = future.result()
+            except Exception as e:
+                errors[topic] = e
+    for timings in traces:
+        metrics.merge_trace(timings)
+    papers, matched_topics = merge_topic_results(results)
+    return papers, matched_topics, errors
+
+def iter_topic_papers(topic, total, client=None, page_size=HARVEST_PAGE_SIZE, query_params=arxiv_query_params):
+    """Stream up to total papers for a topic, paging through arXiv's results.
+    
+    Papers are yielded as each page is parsed, so a caller can work on the
+    first ones while the rest are still downloading. Pass
+    query_params=arxiv_category_params to page through a category's newest
+    submissions instead.
+    """
+    client = client or get_arxiv_client()
+    total = min(total, HARVEST_MAX_RESULTS)
+    for start in range(0, total, page_size):
+        wanted = min(page_size, total - start)
+        count = 0
+        for paper in iter_papers(client.stream(query_params(topic, start, wanted))):
+            count += 1
+            yield paper
+        if count < wanted:
+            return
+
+class PaperStore:
+    """Local SQLite store of fetched papers with a full-text index, deduplicated by arXiv ID"""
+    
+    def __init__(self, path):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS papers (
+                arxiv_id TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                authors TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                published TEXT NOT NULL,
+                topic TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        index_exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'papers_fts'"
+        ).fetchone()
+        # External-content FTS5 index kept in step with the papers table by triggers
+        self._conn.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                title, summary, authors, content='papers', content_rowid='rowid'
+            );
+            CREATE TRIGGER IF NOT EXISTS papers_fts_insert AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts (rowid, title, summary, authors)
+                VALUES (new.rowid, new.title, new.summary, new.authors);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_fts_delete AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors)
+                VALUES ('delete', old.rowid, old.title, old.summary, old.authors);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_fts_update AFTER UPDATE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, summary, authors)
+                VALUES ('delete', old.rowid, old.title, old.summary, old.authors);
+                INSERT INTO papers_fts (rowid, title, summary, authors)
+                VALUES (new.rowid, new.title, new.summary, new.authors);
+            END;
+        """)
+        if not index_exists:
+            self._conn.execute("INSERT INTO papers_fts (papers_fts) VALUES ('rebuild')")
+        self._conn.commit()
+    
+    def add(self, papers, topic):
+        """Insert or refresh papers; the full-text index is updated incrementally"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO papers VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (arxiv_id) DO UPDATE SET
+                    title = excluded.title,
+                    authors = excluded.authors,
+                    summary = excluded.summary,
+                    published = excluded.published,
+                    fetched_at = excluded.fetched_at
+                """,
+                [
+                    (paper.arxiv_id, paper.title, json.dumps(paper.authors),
+                     paper.summary, paper.published, topic, now)
+                    for paper in papers
+                ]
+            )
+            self._conn.commit()
+    
+    def search(self, query, limit=10):
+        """Best BM25 matches for every word of query, as a PaperBatch"""
+        terms = re.findall(r"\w+", query)
+        if not terms:
+            return PaperBatch()
+        match = " ".join(f'"{term}"' for term in terms)
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT p.title, p.authors, p.summary, p.arxiv_id, p.published
+                FROM papers_fts JOIN papers p ON p.rowid = papers_fts.rowid
+                WHERE papers_fts MATCH ?
+                ORDER BY bm25(papers_fts)
+                LIMIT ?
+            """, (match, limit)).fetchall()
+        return PaperBatch(
+            Paper(title, tuple(json.loads(authors)), summary, arxiv_id, published)
+            for title, authors, summary, arxiv_id, published in rows
+        )
+    
+    def count(self, topic=None):
+        with self._lock:
+            if topic is None:
+                return self._conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM papers WHERE topic = ?", (topic,)).fetchone()[0]
+
+@lru_cache(maxsize=None)
+def get_paper_store():
+    """Process-wide paper store, persisted under CACHE_DIR"""
+    return PaperStore(os.path.join(CACHE_DIR, "papers.sqlite3"))
+
+def harvest_checkpoint_path(topic):
+    """Checkpoint file recording how far the harvest of a topic has got"""
+    digest = hashlib.sha1(normalize_topic(topic).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, "harvest", f"{digest}.json")
+
+def harvest_papers(topic, total, store, client, page_size=HARVEST_PAGE_SIZE, checkpoint_path=None, progress=None,
+                   refresh=False, recheck_after=HARVEST_RECHECK_AFTER):
+    """Page through every arXiv result for a topic into a paper store.
+    
+    The next page is downloaded in the background while the current one is
+    parsed and stored. Progress is written to checkpoint_path after each page,
+    so an interrupted harvest resumes where it stopped. A finished harvest is
+    kept for recheck_after seconds and then starts over from the first page to
+    pick up newer papers; refresh=True starts over at once. progress, if
+    given, is called with (harvested, total) after each page. Returns the
+    number of papers harvested for the topic so far.
+    """
+    total = min(total, HARVEST_MAX_RESULTS)
+    start, harvested = 0, 0
+    if checkpoint_path and os.path.exists(checkpoint_path) and not refresh:
+        with open(checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        finished = checkpoint.get('exhausted') or checkpoint['next_start'] >= total
+        stale = time.time() - checkpoint.get('updated_at', 0) > recheck_after
+        if normalize_topic(checkpoint.get('topic', '')) == normalize_topic(topic) and not (finished and stale):
+            start, harvested = checkpoint['next_start'], checkpoint['harvested']
+            if checkpoint.get('exhausted'):
+                return harvested
+    
+    def fetch_page(page_start):
+        return client.fetch(arxiv_query_params(topic, page_start, min(page_size, total - page_start)))
+    
+    exhausted = False
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(fetch_page, start) if start < total else None
+        while pending is not None:
+            feed = pending.result()
+            next_start = start + page_size
+            pending = executor.submit(fetch_page, next_start) if next_start < total else None
+            
+            papers = list(iter_papers([feed]))
+            store.add(papers, topic)
+            harvested += len(papers)
+            exhausted = len(papers) < min(page_size, total - start)
+            start = min(next_start, total)
+            
+            if checkpoint_path:
+                os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+                with open(checkpoint_path, "w", encoding="utf-8") as f:
+                    json.dump({
+                        'topic': topic,
+                        'next_start': start,
+                        'harvested': harvested,
+                        'exhausted': exhausted,
+                        'updated_at': time.time()
+                    }, f)
+            if progress:
+                progress(harvested, total)
+            if exhausted:
+                if pending is not None:
+                    pending.cancel()
+                break
+    return harvested
@@ -0,0 +1,111 @@
+"""Command line for bulk summaries, for cron jobs and other runs without Streamlit.
+
+    python -m paper_summarizer --topic "graph neural networks" --n 500 --out results.jsonl
+
+Repeat --topic to cover several topics; a paper found by more than one is
+summarized and written once, under the first topic that found it. Papers
+are fetched page by page and each one goes to the summary workers as
+soon as it is parsed. Every finished paper is written as one JSON line right
+away, in the order the summaries finish, so the output of an interrupted run
+is still usable. Summaries land in the same on-disk cache as the app's, so a
+rerun only pays for papers that are new or failed.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .arxiv import iter_topic_papers
+from .settings import DEFAULT_INSTRUCTIONS, DEFAULT_MODEL, SUMMARY_ERROR
+from .summaries import get_openrouter_client, summarize_paper
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m paper_summarizer",
+        description="Fetch arXiv papers on a topic and write their summaries as JSON lines."
+    )
+    parser.add_argument("--topic", action="append", required=True, help="arXiv search topic; repeat for several")
+    parser.add_argument("--n", type=int, default=10, help="number of papers per topic (default: 10)")
+    parser.add_argument("--out", default="-", help="JSONL output file, or - for stdout (default)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"OpenRouter model (default: {DEFAULT_MODEL})")
+    parser.add_argument("--instructions", default=DEFAULT_INSTRUCTIONS, help="summary instructions")
+    parser.add_argument("--concurrency", type=int, default=8, help="parallel summary requests (default: 8)")
+    parser.add_argument("--api-key", default=os.environ.get("OPENROUTER_API_KEY"),
+                        help="OpenRouter API key (default: $OPENROUTER_API_KEY)")
+    args = parser.parse_args(argv)
+    if not args.api_key:
+        parser.error("an OpenRouter API key is required: pass --api-key or set OPENROUTER_API_KEY")
+    return args
+
+
+def paper_record(index, topic, paper, model, summary):
+    """JSON-ready output line for a summarized paper"""
+    record = {
+        "index": index,
+        "topic": topic,
+        "arxiv_id": paper.arxiv_id,
+        "title": paper.title,
+        "authors": list(paper.authors),
+        "published": paper.published,
+        "abstract": paper.summary,
+        "model": model,
+        "summary": summary
+    }
+    if not summary or summary.startswith(SUMMARY_ERROR):
+        record.update(summary=None, error=summary or f"{SUMMARY_ERROR}: the model returned no text")
+    return record
+
+
+def run(args, out):
+    """Summarize args.n papers on each of args.topic into out. Returns (written, failed)."""
+    lock = threading.Lock()
+    counts = {"written": 0, "failed": 0}
+    
+    def summarize(index, topic, paper):
+        try:
+            summary = summarize_paper(paper.summary, args.instructions, args.api_key, args.model)
+        except Exception as e:
+            summary = f"{SUMMARY_ERROR}: {str(e)}"
+        record = paper_record(index, topic, paper, args.model, summary)
+        line = json.dumps(record, ensure_ascii=False)
+        with lock:
+            out.write(line + "\n")
+            out.flush()
+            counts["written"] += 1
+            counts["failed"] += "error" in record
+    
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="summarize") as executor:
+        # Load the OpenAI SDK and open the client while the first page downloads;
+        # if that fails, every summary reports the error itself
+        executor.submit(get_openrouter_client, args.api_key)
+        futures = []
+        seen = set()
+        for topic in args.topic:
+            for paper in iter_topic_papers(topic, args.n):
+                if paper.arxiv_id in seen:
+                    continue
+                seen.add(paper.arxiv_id)
+                futures.append(executor.submit(summarize, len(seen) - 1, topic, paper))
+        for future in futures:
+            future.result()
+    return counts["written"], counts["failed"]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.monotonic()
+    out = sys.stdout if args.out == "-" else open(args.out, "w", encoding="utf-8")
+    try:
+        written, failed = run(args, out)
+    except Exception as e:
+        print(f"Error fetching papers: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"{written} papers in {time.monotonic() - started:.1f}s, {failed} without a summary", file=sys.stderr)
+    return 1 if failed else 0
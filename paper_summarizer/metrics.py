@@ -0,0 +1,145 @@
+"""Latency histograms and counters, exported in the Prometheus text format"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .settings import METRICS_BUCKETS
+
+class Metrics:
+    """Thread-safe latency histograms and event counters in Prometheus text format.
+    
+    timer() also adds each duration to the trace open on the calling thread,
+    which is how a search collects its own per-stage timings. Work fanned out
+    to other threads traces there and hands its timings to merge_trace().
+    """
+    
+    def __init__(self, buckets=METRICS_BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def observe(self, stage, seconds):
+        with self._lock:
+            counts, total = self._histograms.get(stage, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+            self._histograms[stage] = (counts, total + seconds)
+            self._counters[f"{stage}_calls"] = self._counters.get(f"{stage}_calls", 0) + 1
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace[stage] = trace.get(stage, 0.0) + seconds
+    
+    def inc(self, event, amount=1):
+        with self._lock:
+            self._counters[event] = self._counters.get(event, 0) + amount
+    
+    def count(self, event):
+        with self._lock:
+            return self._counters.get(event, 0)
+    
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+    
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block under stage"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.monotonic() - started)
+    
+    @contextmanager
+    def trace(self):
+        """Collect the stage timings recorded on this thread into a dict"""
+        previous = getattr(self._local, 'trace', None)
+        self._local.trace = {}
+        try:
+            yield self._local.trace
+        finally:
+            self._local.trace = previous
+    
+    def merge_trace(self, timings):
+        """Add stage timings traced on another thread to this thread's trace, if it has one"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            for stage, seconds in timings.items():
+                trace[stage] = trace.get(stage, 0.0) + seconds
+    
+    def render(self):
+        """Metrics in the Prometheus text exposition format"""
+        with self._lock:
+            histograms = {stage: (list(counts), total) for stage, (counts, total) in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+        
+        lines = ["# TYPE paper_summarizer_stage_seconds histogram"]
+        for stage, (counts, total) in sorted(histograms.items()):
+            calls = counters.get(f"{stage}_calls", 0)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'paper_summarizer_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'paper_summarizer_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {calls}')
+            lines.append(f'paper_summarizer_stage_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'paper_summarizer_stage_seconds_count{{stage="{stage}"}} {calls}')
+        lines.append("# TYPE paper_summarizer_events_total counter")
+        for event, count in sorted(counters.items()):
+            if not event.endswith("_calls"):
+                lines.append(f'paper_summarizer_events_total{{event="{event}"}} {count}')
+        lines.append("# TYPE paper_summarizer_gauge gauge")
+        for name, value in sorted(gauges.items()):
+            lines.append(f'paper_summarizer_gauge{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+    
+    def write(self, path):
+        """Write the metrics to a file for a node_exporter textfile collector"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+@lru_cache(maxsize=None)
+def get_metrics():
+    """Metrics shared by every session"""
+    return Metrics()
+
+def timed(stage):
+    """Decorator recording the duration of every call under stage"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_metrics().timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@lru_cache(maxsize=None)
+def start_metrics_server(port):
+    """Serve the metrics at /metrics on a background thread"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = get_metrics().render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("", port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,289 @@
+"""Rate limits, circuit breakers and request coalescing for the upstream APIs"""
+import math
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache
+
+import httpx
+import requests
+
+from .metrics import get_metrics
+from .settings import (
+    ADAPTIVE_TIMEOUT_FACTOR, ADAPTIVE_TIMEOUT_MIN_SAMPLES, ADAPTIVE_TIMEOUT_WINDOW, ARXIV_RATE_LIMIT,
+    ARXIV_TIMEOUT, ARXIV_TIMEOUT_BOUNDS, BREAKER_FAILURE_THRESHOLD, BREAKER_MAX_RESET_TIMEOUT,
+    BREAKER_RESET_TIMEOUT, OPENROUTER_RATE_LIMIT, OPENROUTER_TIMEOUT, OPENROUTER_TIMEOUT_BOUNDS
+)
+
+class RateLimiter:
+    """Thread-safe token bucket; callers only wait once the burst budget is used up"""
+    
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.delayed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Take one token, sleeping until it is available. Returns the seconds waited."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve the token up front so waiting callers are served in arrival order
+            self._tokens -= 1
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            if not delay:
+                return 0.0
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+        
+        try:
+            time.sleep(delay)
+        finally:
+            with self._lock:
+                self.waiting -= 1
+                self.delayed += 1
+                self.total_wait += delay
+                self.max_wait = max(self.max_wait, delay)
+        return delay
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': self.waiting,
+                'max_queue_depth': self.max_waiting,
+                'acquired': self.acquired,
+                'delayed': self.delayed,
+                'avg_wait': self.total_wait / self.delayed if self.delayed else 0.0,
+                'max_wait': self.max_wait
+            }
+
+@lru_cache(maxsize=None)
+def get_rate_limiters():
+    """Outbound rate limiters shared by every session in the process"""
+    return {
+        'arxiv': RateLimiter(*ARXIV_RATE_LIMIT),
+        'openrouter': RateLimiter(*OPENROUTER_RATE_LIMIT)
+    }
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+class CircuitBreaker:
+    """Per-upstream circuit breaker that also sets the upstream's timeout.
+    
+    failure_threshold consecutive failures open the circuit, and calls then
+    fail fast with CircuitOpenError. After a reset timeout one trial call is
+    let through: success closes the circuit, failure reopens it for twice as
+    long, with jitter so processes don't retry in lockstep. A trial that ends
+    without an answer, such as a cancelled one, is released for the next
+    call. The timeout is factor times the p95 of recent latencies, within
+    bounds, or the default until enough samples are in. Different kinds of
+    call keep their latencies in separate windows; a window of per-unit
+    latencies, such as seconds per generated token, is scaled by the size of
+    the next call.
+    """
+    
+    STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+    
+    def __init__(self, name, default_timeout, min_timeout, max_timeout,
+                 failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT,
+                 max_reset_timeout=BREAKER_MAX_RESET_TIMEOUT, window=ADAPTIVE_TIMEOUT_WINDOW,
+                 min_samples=ADAPTIVE_TIMEOUT_MIN_SAMPLES, factor=ADAPTIVE_TIMEOUT_FACTOR):
+        self.name = name
+        self.default_timeout = default_timeout
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.window = window
+        self.min_samples = min_samples
+        self.factor = factor
+        self.state = 'closed'
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self.retry_at = 0.0
+        self._trial_started = None
+        self._latencies = {}  # window name -> recent latencies
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        """Raise CircuitOpenError unless a call may go ahead"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == 'open' and now >= self.retry_at:
+                self._set_state('half_open')
+            if self.state == 'half_open':
+                # One trial at a time; a trial that never reported back is given up on
+                if self._trial_started is None or now - self._trial_started > self.max_timeout:
+                    self._trial_started = now
+                    return
+            elif self.state == 'closed':
+                return
+            self.rejected += 1
+            retry_in = self._retry_in(now)
+        get_metrics().inc(f'circuit_rejected_{self.name}')
+        raise CircuitOpenError(f"{self.name} is failing, not retrying for {math.ceil(retry_in)}s")
+    
+    def _retry_in(self, now):
+        """Seconds until a call may go ahead again; while half open, until the trial in flight is given up on"""
+        if self.state == 'half_open' and self._trial_started is not None:
+            return max(self._trial_started + self.max_timeout - now, 0)
+        if self.state == 'open':
+            return max(self.retry_at - now, 0)
+        return 0
+    
+    def record_success(self, latency=None, window='default'):
+        """Record a call the upstream answered, with its latency if it should shape the timeout"""
+        with self._lock:
+            if latency is not None:
+                self._latencies.setdefault(window, deque(maxlen=self.window)).append(latency)
+            self.failures = 0
+            self.trips = 0
+            self._trial_started = None
+            self._set_state('closed')
+    
+    def release_trial(self):
+        """Give back a trial call that ended without an answer, such as a cancelled one"""
+        with self._lock:
+            self._trial_started = None
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_started = None
+            if self.state == 'half_open' or (self.state == 'closed' and self.failures >= self.failure_threshold):
+                self.trips += 1
+                backoff = min(self.reset_timeout * 2 ** (self.trips - 1), self.max_reset_timeout)
+                self.retry_at = time.monotonic() + backoff * random.uniform(0.5, 1.5)
+                self._set_state('open')
+                get_metrics().inc(f'circuit_opened_{self.name}')
+    
+    def _set_state(self, state):
+        self.state = state
+        get_metrics().set_gauge(f'circuit_state_{self.name}', self.STATES[state])
+    
+    def p95(self, window='default'):
+        with self._lock:
+            samples = sorted(self._latencies.get(window, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    
+    def timeout(self, window='default', scale=1):
+        """Timeout for the next call to the upstream, for a call of scale units when the window is per unit"""
+        p95 = self.p95(window)
+        timeout = self.default_timeout if p95 is None else min(
+            max(p95 * scale * self.factor, self.min_timeout), self.max_timeout
+        )
+        get_metrics().set_gauge(
+            f'timeout_seconds_{self.name}' if window == 'default' else f'timeout_seconds_{self.name}_{window}',
+            round(timeout, 3)
+        )
+        return timeout
+    
+    def stats(self):
+        with self._lock:
+            retry_in = self._retry_in(time.monotonic())
+            stats = {
+                'state': self.state,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'retry_in': retry_in
+            }
+            windows = list(self._latencies)
+        stats['p95'] = self.p95()
+        stats['timeout'] = self.timeout()
+        stats['windows'] = {window: self.p95(window) for window in windows if window != 'default'}
+        return stats
+
+def is_upstream_failure(error):
+    """Whether an error says the upstream is unhealthy, as opposed to a bad request"""
+    if isinstance(error, requests.HTTPError):
+        return error.response is not None and (error.response.status_code == 429 or error.response.status_code >= 500)
+    if isinstance(error, (requests.ConnectionError, requests.Timeout, requests.exceptions.RetryError, httpx.TransportError)):
+        return True
+    # The OpenAI SDK is imported on first use, so its errors only exist once it is loaded.
+    # RateLimitError is left out: OpenRouter limits and bills each API key on its own,
+    # so one key's 429s say nothing about the upstream other sessions use.
+    openai = sys.modules.get('openai')
+    return openai is not None and isinstance(error, (openai.APIConnectionError, openai.InternalServerError))
+
+@lru_cache(maxsize=None)
+def get_circuit_breakers():
+    """Circuit breakers for each upstream, shared by every session in the process"""
+    return {
+        'arxiv': CircuitBreaker('arxiv', ARXIV_TIMEOUT, *ARXIV_TIMEOUT_BOUNDS),
+        'openrouter': CircuitBreaker('openrouter', OPENROUTER_TIMEOUT.read, *OPENROUTER_TIMEOUT_BOUNDS)
+    }
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one upstream request.
+    
+    The first caller for a key runs the call; callers arriving while it is in
+    flight wait for it and get the same result or exception. Nothing is kept
+    once the call returns, which is what the caches in front of it are for.
+    """
+    
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, func, *args, **kwargs):
+        """func(*args, **kwargs), or the result of the identical call already in flight"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+        if not leader:
+            get_metrics().inc(f'coalesced_{self.name}')
+            return flight.result()
+        
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._flights),
+                'calls': self.calls,
+                'coalesced': self.coalesced
+            }
+
+@lru_cache(maxsize=None)
+def get_single_flights():
+    """Process-wide coalescing of identical arXiv searches and summary requests"""
+    return {
+        'search': SingleFlight('search'),
+        'summary': SingleFlight('summary')
+    }
@@ -0,0 +1,326 @@
+"""Search result cache with memory, SQLite and Redis backends"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import unquote, urlparse
+
+from .arxiv import Paper, PaperBatch, normalize_topic, search_papers
+from .metrics import get_metrics
+from .resilience import get_single_flights
+from .settings import CACHE_DIR, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_STALE_TTL, SEARCH_CACHE_TTL, SEARCH_CACHE_URL
+
+class MemoryCacheBackend:
+    """In-process LRU cache; entries are lost on restart and not shared between replicas"""
+    
+    name = "memory"
+    
+    def __init__(self, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def count(self):
+        with self._lock:
+            return len(self._entries)
+
+class SQLiteCacheBackend:
+    """On-disk LRU cache that survives restarts and is shared by processes on the same machine"""
+    
+    name = "sqlite"
+    
+    def __init__(self, path, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS searches (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS searches_accessed_at ON searches (accessed_at)")
+        self._conn.commit()
+    
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM searches WHERE key = ? AND expires_at >= ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE searches SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+    
+    def set(self, key, value, ttl):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self._conn.execute("DELETE FROM searches WHERE expires_at < ?", (now,))
+            self._conn.execute("""
+                DELETE FROM searches WHERE key IN (
+                    SELECT key FROM searches ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+            self._conn.commit()
+    
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM searches").fetchone()[0]
+
+class RedisError(Exception):
+    """Error reply from a Redis server"""
+
+class RedisCacheBackend:
+    """Cache in Redis, or any server speaking its protocol, shared by every replica.
+    
+    Speaks just enough RESP for GET, SET with an expiry, AUTH and SELECT over
+    one keep-alive connection, so there is no client library to install.
+    Redis evicts the entries itself once they expire.
+    """
+    
+    name = "redis"
+    
+    def __init__(self, url, timeout=1.0, prefix="paper_summarizer:search:"):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.timeout = timeout
+        self.prefix = prefix
+        self._sock = None
+        self._reader = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        try:
+            if self.password:
+                self._call("AUTH", self.password)
+            if self.db:
+                self._call("SELECT", self.db)
+        except Exception:
+            # A connection that isn't authenticated or on the right database is never kept
+            self.close()
+            raise
+    
+    def _call(self, *args):
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+    
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Redis closed the connection")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise RedisError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            return None if length < 0 else self._reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply {line!r}")
+    
+    def command(self, *args):
+        """Run one command, reconnecting first if the last connection broke"""
+        with self._lock:
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call(*args)
+            except OSError:
+                self.close()
+                raise
+    
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._reader = None
+    
+    def get(self, key):
+        return self.command("GET", self.prefix + key)
+    
+    def set(self, key, value, ttl):
+        self.command("SET", self.prefix + key, value, "PX", int(ttl * 1000))
+    
+    def count(self):
+        return None  # counting would mean scanning keys the other replicas share
+
+def make_search_cache_backend(url=SEARCH_CACHE_URL):
+    """Backend for "memory", "sqlite" or a redis:// URL"""
+    if url == "memory":
+        return MemoryCacheBackend()
+    if url == "sqlite":
+        return SQLiteCacheBackend(os.path.join(CACHE_DIR, "searches.sqlite3"))
+    if url.startswith("redis://"):
+        return RedisCacheBackend(url)
+    raise ValueError(f"Unknown search cache {url!r}; use memory, sqlite or redis://host:port/db")
+
+def encode_search(papers, stored_at):
+    """JSON bytes for a cached search: the PaperBatch columns and when they were fetched"""
+    return json.dumps({
+        'stored_at': stored_at,
+        'papers': {field: getattr(papers, field) for field in Paper._fields}
+    }).encode("utf-8")
+
+def decode_search(value):
+    """(papers, stored_at) from encode_search() bytes"""
+    entry = json.loads(value)
+    columns = [entry['papers'][field] for field in Paper._fields]
+    return PaperBatch(
+        Paper(title, tuple(authors), summary, arxiv_id, published)
+        for title, authors, summary, arxiv_id, published in zip(*columns)
+    ), entry['stored_at']
+
+class SearchCache:
+    """Search results in front of arXiv, served stale while they are revalidated.
+    
+    Results are fresh for ttl seconds. For stale_ttl seconds after that they
+    are still returned at once, while one background fetch per search
+    replaces them. Only older or missing entries make the caller wait for
+    arXiv, and concurrent identical fetches, background refreshes included,
+    share one request. A failing backend counts as a miss, so a cache outage
+    slows searches down without failing them.
+    """
+    
+    def __init__(self, backend, fetch=search_papers, ttl=SEARCH_CACHE_TTL, stale_ttl=SEARCH_CACHE_STALE_TTL):
+        self.backend = backend
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+    
+    @staticmethod
+    def make_key(topic, max_results):
+        return f"{max_results}:{normalize_topic(topic)}"
+    
+    def search(self, topic, max_results=10):
+        """Papers for a topic, from the cache when it has them"""
+        topic = normalize_topic(topic)
+        key = self.make_key(topic, max_results)
+        entry = self._load(key)
+        if entry is not None:
+            papers, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.ttl:
+                self._count('hits')
+                return papers
+            if age < self.ttl + self.stale_ttl:
+                self._count('stale_hits')
+                self._refresh_later(key, topic, max_results)
+                return papers
+        self._count('misses')
+        return get_single_flights()['search'].do(key, self._refresh, key, topic, max_results)
+    
+    def _count(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+        get_metrics().inc(f'search_cache_{outcome}')
+    
+    def _load(self, key):
+        try:
+            value = self.backend.get(key)
+            return decode_search(value) if value is not None else None
+        except Exception:
+            self._count('errors')
+            return None
+    
+    def _refresh(self, key, topic, max_results):
+        papers = self.fetch(topic, max_results)
+        try:
+            self.backend.set(key, encode_search(papers, time.time()), self.ttl + self.stale_ttl)
+        except Exception:
+            self._count('errors')
+        return papers
+    
+    def _refresh_later(self, key, topic, max_results):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def refresh():
+            try:
+                get_single_flights()['search'].do(key, self._refresh, key, topic, max_results)
+            except Exception:
+                get_metrics().inc('search_refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+        self._executor.submit(refresh)
+    
+    def stats(self):
+        try:
+            entries = self.backend.count()
+        except Exception:
+            entries = None
+        with self._lock:
+            return {
+                'backend': self.backend.name,
+                'entries': entries,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'errors': self.errors,
+                'refreshing': len(self._refreshing)
+            }
+
+@lru_cache(maxsize=None)
+def get_search_cache():
+    """Process-wide search cache on the backend PAPER_SUMMARIZER_SEARCH_CACHE names"""
+    return SearchCache(make_search_cache_backend())
+
+def cached_search_papers(topic, max_results=10):
+    """search_papers() through the shared search cache"""
+    return get_search_cache().search(topic, max_results)
@@ -0,0 +1,69 @@
+"""Settings shared by the app and the command line"""
+import os
+
+import httpx
+
+ARXIV_API_URL = os.environ.get("ARXIV_API_URL", "http://export.arxiv.org/api/query")
+ARXIV_TIMEOUT = 15
+ARXIV_MAX_RETRIES = 3
+ARXIV_RETRY_BACKOFF = 3  # arXiv asks API clients to wait 3 seconds between calls
+ARXIV_RATE_LIMIT = (1 / 3, 1)  # (requests per second, burst)
+ARXIV_CHUNK_SIZE = 64 * 1024
+ATOM_NS = '{http://www.w3.org/2005/Atom}'
+HARVEST_PAGE_SIZE = 500
+HARVEST_MAX_RESULTS = 30000  # arXiv caps a single query at 30000 results
+HARVEST_RECHECK_AFTER = 24 * 60 * 60  # seconds before a finished harvest starts over to pick up new papers
+TOPIC_SEARCH_WORKERS = 4
+TOPIC_RANK_CONSTANT = 60  # reciprocal rank fusion damping when merging results of several topics
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+OPENROUTER_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+OPENROUTER_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+OPENROUTER_RATE_LIMIT = (5, 20)  # (requests per second, burst)
+ARXIV_TIMEOUT_BOUNDS = (3, 30)  # (min, max) seconds for the adaptive arXiv timeout
+OPENROUTER_TIMEOUT_BOUNDS = (5, 60)  # (min, max) seconds for the adaptive OpenRouter timeout
+ADAPTIVE_TIMEOUT_FACTOR = 3  # adaptive timeouts allow this multiple of the observed p95 latency
+ADAPTIVE_TIMEOUT_WINDOW = 200  # latency samples kept per upstream
+ADAPTIVE_TIMEOUT_MIN_SAMPLES = 20  # below this the default timeout is used
+BREAKER_FAILURE_THRESHOLD = 5  # consecutive failures that open a circuit
+BREAKER_RESET_TIMEOUT = 10  # seconds before an open circuit lets a trial call through, doubled on each reopen
+BREAKER_MAX_RESET_TIMEOUT = 300
+CACHE_DIR = os.environ.get("PAPER_SUMMARIZER_CACHE_DIR", ".cache")
+DEFAULT_MODEL = "anthropic/claude-3-haiku"
+DEFAULT_INSTRUCTIONS = "You are an expert research analyst. Provide a clear, comprehensive summary under 100 words highlighting key findings, methodology, and significance."
+SUMMARY_TEMPERATURE = 0.7
+SUMMARY_MAX_TOKENS = 500  # when the instructions give no word limit
+SUMMARY_ABSTRACT_MAX_TOKENS = 1500
+TOKENS_PER_WORD = 1.5
+SUMMARY_BATCH_MAX_PAPERS = 10
+SUMMARY_BATCH_PROMPT_TOKENS = 300  # instructions and JSON format of a batched request
+MODEL_LIMITS = {  # (context window, max output tokens)
+    "google/gemma-2-9b-it": (8192, 8192),
+    "anthropic/claude-3-haiku": (200000, 4096),
+    "openai/gpt-3.5-turbo": (16385, 4096),
+    "meta-llama/llama-3-8b-instruct": (8192, 8192)
+}
+DEFAULT_MODEL_LIMITS = (8192, 4096)
+MODEL_PRICES = {  # (prompt, completion) US dollars per million tokens on OpenRouter
+    "google/gemma-2-9b-it": (0.08, 0.08),
+    "anthropic/claude-3-haiku": (0.25, 1.25),
+    "openai/gpt-3.5-turbo": (0.5, 1.5),
+    "meta-llama/llama-3-8b-instruct": (0.06, 0.06)
+}
+DEFAULT_MODEL_PRICES = (3.0, 15.0)  # deliberately high, so an unpriced model can't overrun a budget
+SUMMARY_CACHE_MAX_ENTRIES = 5000
+SUMMARY_CACHE_TTL = 7 * 24 * 60 * 60  # one week
+SEARCH_CACHE_URL = os.environ.get("PAPER_SUMMARIZER_SEARCH_CACHE", "sqlite")  # memory, sqlite or redis://host:port/db
+SEARCH_CACHE_TTL = 300  # seconds a cached search is fresh
+SEARCH_CACHE_STALE_TTL = 24 * 60 * 60  # seconds after that it is still served while a fresh copy is fetched
+SEARCH_CACHE_MAX_ENTRIES = 1000
+SUMMARY_ERROR = "Error generating summary"
+WARMUP_CATEGORIES = os.environ.get("PAPER_SUMMARIZER_WARMUP_CATEGORIES", "cs.AI,cs.CL,cs.CV,cs.LG").split(",")
+WARMUP_PAPERS_PER_CATEGORY = 100  # newest submissions considered per category and run
+WARMUP_BUDGET = float(os.environ.get("PAPER_SUMMARIZER_WARMUP_BUDGET", "0.50"))  # US dollars per warm-up run
+HEDGE_AFTER = 4.0  # default seconds without a first token before a backup model is tried
+MODEL_LATENCY_SMOOTHING = 0.3  # weight of the newest sample in per-model latency averages
+MODEL_UNHEALTHY_FAILURES = 3  # consecutive upstream failures before a model is skipped as a backup
+MODEL_UNHEALTHY_COOLDOWN = 60  # seconds before a model skipped as a backup is tried again
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+METRICS_FILE = os.path.join(CACHE_DIR, "metrics.prom")
+METRICS_PORT = int(os.environ.get("PAPER_SUMMARIZER_METRICS_PORT", "0"))  # 0 disables the HTTP endpoint
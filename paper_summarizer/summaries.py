@@ -0,0 +1,788 @@
+"""LLM summaries through OpenRouter: prompts, caching, streaming, hedging and batching"""
+import hashlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+
+import httpx
+
+from .metrics import get_metrics, timed
+from .resilience import get_circuit_breakers, get_rate_limiters, get_single_flights, is_upstream_failure
+from .settings import (
+    CACHE_DIR, DEFAULT_MODEL_LIMITS, HEDGE_AFTER, MODEL_LATENCY_SMOOTHING, MODEL_LIMITS, MODEL_UNHEALTHY_COOLDOWN,
+    MODEL_UNHEALTHY_FAILURES,
+    OPENROUTER_BASE_URL, OPENROUTER_LIMITS, OPENROUTER_TIMEOUT, SUMMARY_ABSTRACT_MAX_TOKENS, SUMMARY_BATCH_MAX_PAPERS,
+    SUMMARY_BATCH_PROMPT_TOKENS, SUMMARY_CACHE_MAX_ENTRIES, SUMMARY_CACHE_TTL, SUMMARY_ERROR, SUMMARY_MAX_TOKENS,
+    SUMMARY_TEMPERATURE, TOKENS_PER_WORD
+)
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to an estimate
+    tiktoken = None
+
+class SummaryCache:
+    """Disk-backed summary cache with TTL expiry and LRU eviction, shared by all sessions"""
+    
+    def __init__(self, path, max_entries=SUMMARY_CACHE_MAX_ENTRIES, ttl=SUMMARY_CACHE_TTL):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                summary TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)")
+        self._conn.commit()
+    
+    @staticmethod
+    def make_key(summary_text, instruction_prompt, model, temperature, max_tokens):
+        """Content hash of everything that determines a summary"""
+        payload = json.dumps([summary_text, instruction_prompt, model, temperature, max_tokens])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary, created_at FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+    
+    def set(self, key, summary):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, summary, now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+    
+    def _evict(self, now):
+        """Drop expired entries, then the least recently used ones above the size bound"""
+        self._conn.execute("DELETE FROM summaries WHERE created_at < ?", (now - self.ttl,))
+        self._conn.execute("""
+            DELETE FROM summaries WHERE key IN (
+                SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_entries,))
+    
+    def stats(self):
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+@lru_cache(maxsize=None)
+def get_summary_cache():
+    """Process-wide summary cache, persisted under CACHE_DIR"""
+    return SummaryCache(os.path.join(CACHE_DIR, "summaries.sqlite3"))
+
+class ConnectionReuseTracker:
+    """httpx request hook counting how many requests opened a new connection"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+    
+    def __call__(self, request):
+        request.extensions["trace"] = self._trace
+        with self._lock:
+            self.requests += 1
+    
+    def _trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.new_connections += 1
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': self.requests - self.new_connections
+            }
+
+@lru_cache(maxsize=None)
+def get_connection_tracker():
+    """Connection reuse statistics for all OpenRouter clients"""
+    return ConnectionReuseTracker()
+
+@lru_cache(maxsize=100)
+def get_openrouter_client(api_key):
+    """OpenRouter client for an API key, shared by all sessions and threads.
+    
+    Keeping one client per key keeps its connection pool alive, so requests
+    after the first skip the TCP and TLS handshakes.
+    """
+    from openai import OpenAI  # imported here; it takes longer to import than the rest of the package
+    
+    http_client = httpx.Client(
+        limits=OPENROUTER_LIMITS,
+        timeout=OPENROUTER_TIMEOUT,
+        event_hooks={'request': [get_connection_tracker()]}
+    )
+    return OpenAI(
+        base_url=OPENROUTER_BASE_URL,
+        api_key=api_key,
+        http_client=http_client
+    )
+
+def create_completion(api_key, **request):
+    """Send a chat completion through the OpenRouter circuit breaker and rate limiter.
+    
+    The read timeout adapts to recent latency. A stream is timed on the gap
+    before its first token, and reports that to the breaker itself once the
+    token arrives. A plain request waits for the whole reply, so it is timed
+    on recent seconds per generated token times its max_tokens, and reports
+    its own seconds per token here. The two are kept in separate windows.
+    """
+    breaker = get_circuit_breakers()['openrouter']
+    breaker.allow()
+    try:
+        client = get_openrouter_client(api_key)
+        get_rate_limiters()['openrouter'].acquire()
+    except BaseException:
+        breaker.release_trial()
+        raise
+    
+    if request.get('stream'):
+        timeout = breaker.timeout()
+    else:
+        timeout = breaker.timeout('per_token', scale=request.get('max_tokens') or SUMMARY_MAX_TOKENS)
+    started = time.monotonic()
+    try:
+        response = client.chat.completions.create(
+            timeout=httpx.Timeout(timeout, connect=OPENROUTER_TIMEOUT.connect),
+            **request
+        )
+    except Exception as e:
+        if is_upstream_failure(e):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        raise
+    if not request.get('stream'):
+        usage = getattr(response, 'usage', None)
+        tokens = usage.completion_tokens if usage is not None else None
+        if not tokens and response.choices:
+            tokens = count_tokens(response.choices[0].message.content or "")
+        breaker.record_success((time.monotonic() - started) / max(tokens or 0, 1), window='per_token')
+    return response
+
+class UsageLedger:
+    """Per-model token counts, latency and health of LLM requests.
+    
+    A model is unhealthy after unhealthy_failures upstream failures in a row,
+    and is given another chance once unhealthy_cooldown seconds have passed
+    since the last of them.
+    """
+    
+    def __init__(self, smoothing=MODEL_LATENCY_SMOOTHING, unhealthy_failures=MODEL_UNHEALTHY_FAILURES,
+                 unhealthy_cooldown=MODEL_UNHEALTHY_COOLDOWN):
+        self.smoothing = smoothing
+        self.unhealthy_failures = unhealthy_failures
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self._models = {}
+        self._lock = threading.Lock()
+    
+    def _totals(self, model):
+        return self._models.setdefault(model, {
+            'requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'latency': 0.0,
+            'first_token': None, 'errors': 0, 'consecutive_errors': 0, 'last_error': None
+        })
+    
+    def record(self, model, prompt_tokens, completion_tokens, latency):
+        with self._lock:
+            totals = self._totals(model)
+            totals['requests'] += 1
+            totals['prompt_tokens'] += prompt_tokens
+            totals['completion_tokens'] += completion_tokens
+            totals['latency'] += latency
+            totals['consecutive_errors'] = 0
+    
+    def record_first_token(self, model, latency):
+        """Fold a time to first token into the model's moving average"""
+        with self._lock:
+            totals = self._totals(model)
+            previous = totals['first_token']
+            totals['first_token'] = latency if previous is None else (
+                self.smoothing * latency + (1 - self.smoothing) * previous
+            )
+    
+    def record_error(self, model):
+        """Count an upstream failure against a model; errors of the caller's own making shouldn't be"""
+        with self._lock:
+            totals = self._totals(model)
+            totals['errors'] += 1
+            totals['consecutive_errors'] += 1
+            totals['last_error'] = time.monotonic()
+    
+    def _healthy(self, totals, now):
+        return (
+            totals is None or totals['consecutive_errors'] < self.unhealthy_failures
+            or now - totals['last_error'] >= self.unhealthy_cooldown
+        )
+    
+    def is_healthy(self, model):
+        with self._lock:
+            return self._healthy(self._models.get(model), time.monotonic())
+    
+    def fastest_model(self, models, default_latency=HEDGE_AFTER):
+        """The healthy model with the lowest average time to first token.
+        
+        Models with no samples yet count as default_latency, so an untried
+        model is preferred over one known to be slower than that.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [
+                (totals['first_token'] if totals and totals['first_token'] is not None else default_latency, model)
+                for model, totals in ((model, self._models.get(model)) for model in models)
+                if self._healthy(totals, now)
+            ]
+        return min(candidates)[1] if candidates else None
+    
+    def stats(self):
+        with self._lock:
+            return {model: dict(totals) for model, totals in self._models.items()}
+
+@lru_cache(maxsize=None)
+def get_usage_ledger():
+    """Token usage of every LLM request made by the process"""
+    return UsageLedger()
+
+@lru_cache(maxsize=None)
+def get_token_encoding(model):
+    """tiktoken encoding for a model, or None when token counts are estimated"""
+    if tiktoken is None or model is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model.split("/")[-1])
+    except KeyError:
+        pass
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+def count_tokens(text, model=None):
+    """Token count of text for a model, or about four characters per token without tiktoken"""
+    encoding = get_token_encoding(model)
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+def trim_to_tokens(text, max_tokens, model=None):
+    """text cut back at a word boundary so it fits in max_tokens"""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    encoding = get_token_encoding(model)
+    if encoding is None:
+        cut = text[:max(0, max_tokens - 1) * 4]
+    else:
+        cut = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens - 1])
+    return cut.rsplit(" ", 1)[0] + " …"
+
+def summary_max_tokens(instruction_prompt, model):
+    """Completion budget for one summary, sized from a word limit in the instructions"""
+    match = re.search(r"(\d+)\s*words", instruction_prompt, re.IGNORECASE)
+    if not match:
+        return SUMMARY_MAX_TOKENS
+    max_output_tokens = MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)[1]
+    return min(max_output_tokens, int(int(match.group(1)) * TOKENS_PER_WORD) + 64)
+
+def abstract_token_budget(instruction_prompt, model):
+    """Tokens an abstract may use in a single-paper prompt"""
+    context_window = MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)[0]
+    available = (context_window - summary_max_tokens(instruction_prompt, model)
+                 - count_tokens(instruction_prompt, model) - 100)
+    return max(64, min(SUMMARY_ABSTRACT_MAX_TOKENS, available))
+
+def build_summary_prompt(summary_text, instruction_prompt, model=None):
+    """Prompt sent to the model for a single paper, without padding and within budget"""
+    abstract = trim_to_tokens(" ".join(summary_text.split()), abstract_token_budget(instruction_prompt, model), model)
+    return f"""{instruction_prompt.strip()}
+
+Research Paper Abstract:
+{abstract}
+
+Please provide a structured analysis covering:
+1. Main contribution and novelty
+2. Methodology used
+3. Key findings
+4. Potential impact"""
+
+def record_usage(model, usage, prompt, completion_text, started):
+    """Record a request's token counts, preferring the usage reported by the provider.
+    
+    Returns the (prompt_tokens, completion_tokens) recorded.
+    """
+    if usage is not None:
+        prompt_tokens, completion_tokens = usage.prompt_tokens, usage.completion_tokens
+    else:
+        prompt_tokens, completion_tokens = count_tokens(prompt, model), count_tokens(completion_text, model)
+    latency = time.monotonic() - started
+    get_usage_ledger().record(model, prompt_tokens, completion_tokens, latency)
+    get_metrics().observe('llm_request', latency)
+    return prompt_tokens, completion_tokens
+
+def summary_cache_key(summary_text, instruction_prompt, model):
+    """Summary cache key for a paper under the current generation settings"""
+    return SummaryCache.make_key(
+        summary_text, instruction_prompt, model, SUMMARY_TEMPERATURE,
+        summary_max_tokens(instruction_prompt, model)
+    )
+
+def api_key_fingerprint(api_key):
+    """Short hash identifying an API key without revealing it"""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+@timed('summarize_paper')
+def summarize_paper(summary_text, instruction_prompt, api_key, model):
+    """Summarize paper using AI, reusing cached summaries for identical requests"""
+    return summarize_paper_with_usage(summary_text, instruction_prompt, api_key, model)[0]
+
+def summarize_paper_with_usage(summary_text, instruction_prompt, api_key, model):
+    """summarize_paper() plus the (prompt_tokens, completion_tokens) its request used.
+    
+    Token counts are the provider's whenever it reports them. A summary from
+    the cache used (0, 0); a failed request gives None, as its cost is unknown.
+    """
+    if not api_key:
+        return "Please provide an API key to generate summaries.", (0, 0)
+    
+    cache = get_summary_cache()
+    cache_key = summary_cache_key(summary_text, instruction_prompt, model)
+    cached_summary = cache.get(cache_key)
+    if cached_summary is not None:
+        return cached_summary, (0, 0)
+    
+    def request():
+        try:
+            prompt = build_summary_prompt(summary_text, instruction_prompt, model)
+            started = time.monotonic()
+            completion = create_completion(
+                api_key,
+                model=model,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }],
+                temperature=SUMMARY_TEMPERATURE,
+                max_tokens=summary_max_tokens(instruction_prompt, model)
+            )
+            
+            summary = completion.choices[0].message.content
+            usage = record_usage(model, completion.usage, prompt, summary or "", started)
+        except Exception as e:
+            get_metrics().inc('summary_errors')
+            if is_upstream_failure(e):
+                get_usage_ledger().record_error(model)
+            return f"{SUMMARY_ERROR}: {str(e)}", None
+        
+        if summary:
+            cache.set(cache_key, summary)
+        return summary, usage
+    
+    # Sessions asking for the same summary with the same key at the same time
+    # share one request; a bad or exhausted key only fails its own callers
+    return get_single_flights()['summary'].do(f"{cache_key}:{api_key_fingerprint(api_key)}", request)
+
+def stream_summary(summary_text, instruction_prompt, api_key, model, cancel_event=None):
+    """Summarize paper using AI, yielding text chunks as the model generates them.
+    
+    Setting cancel_event stops the generation and closes the underlying stream.
+    Only complete summaries are written to the summary cache.
+    """
+    if not api_key:
+        yield "Please provide an API key to generate summaries."
+        return
+    
+    cache = get_summary_cache()
+    cache_key = summary_cache_key(summary_text, instruction_prompt, model)
+    cached_summary = cache.get(cache_key)
+    if cached_summary is not None:
+        yield cached_summary
+        return
+    
+    parts = []
+    try:
+        prompt = build_summary_prompt(summary_text, instruction_prompt, model)
+        started = time.monotonic()
+        stream = create_completion(
+            api_key,
+            model=model,
+            messages=[{
+                "role": "user",
+                "content": prompt
+            }],
+            temperature=SUMMARY_TEMPERATURE,
+            max_tokens=summary_max_tokens(instruction_prompt, model),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        breaker = get_circuit_breakers()['openrouter']
+        reported = False
+        try:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                if getattr(chunk, 'usage', None) is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not parts:
+                        first_token = time.monotonic() - started
+                        get_metrics().observe('llm_first_token', first_token)
+                        get_usage_ledger().record_first_token(model, first_token)
+                        breaker.record_success(first_token)
+                        reported = True
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+        except Exception as e:
+            # Failures before the first token count against the breaker;
+            # once tokens flow the upstream has already proven healthy.
+            if not reported:
+                if is_upstream_failure(e):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                reported = True
+            raise
+        else:
+            if not reported:
+                breaker.record_success()
+                reported = True
+        finally:
+            stream.close()
+            if not reported:
+                # Cancelled or closed before the first token, so the call says
+                # nothing about the upstream; a half-open trial is handed back
+                breaker.release_trial()
+    except Exception as e:
+        get_metrics().inc('summary_errors')
+        if is_upstream_failure(e):
+            get_usage_ledger().record_error(model)
+        yield f"{SUMMARY_ERROR}: {str(e)}"
+        return
+    
+    record_usage(model, usage, prompt, "".join(parts), started)
+    if parts:
+        cache.set(cache_key, "".join(parts))
+
+def run_summary_tasks(tasks, count, max_workers=4):
+    """Run summary tasks on a thread pool, yielding (index, text, done) as they report.
+    
+    Each task is called with a report(index, chunk) callback and should end
+    every paper it handles with report(index, None). text is everything
+    reported so far for that paper, so streamed summaries grow with each
+    update. Papers still open once every task has returned or raised are
+    ended with an error, so a failing task can't leave the consumer waiting.
+    Tasks still queued when the consumer stops are cancelled.
+    """
+    updates = queue.Queue()
+    
+    def report(index, chunk):
+        updates.put((index, chunk))
+    
+    def run(task):
+        error = None
+        try:
+            task(report)
+        except Exception as e:
+            error = e
+        finally:
+            updates.put((None, error))
+    
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        running = 0
+        for task in tasks:
+            executor.submit(run, task)
+            running += 1
+        
+        texts = [""] * count
+        done = [False] * count
+        remaining, error = count, None
+        while remaining and running:
+            index, chunk = updates.get()
+            if index is None:
+                running -= 1
+                error = chunk or error
+            elif done[index]:
+                continue
+            elif chunk is None:
+                done[index] = True
+                remaining -= 1
+                yield index, texts[index], True
+            else:
+                texts[index] += chunk
+                yield index, texts[index], False
+        
+        for index in range(count):
+            if not done[index]:
+                yield index, texts[index] or f"{SUMMARY_ERROR}: {error or 'no summary was produced'}", True
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def hedged_summary(summary_text, instruction_prompt, api_key, model, backup_model,
+                   hedge_after=HEDGE_AFTER, cancel_event=None):
+    """Stream a summary from model, racing backup_model when model is slow to start.
+    
+    The backup request is sent once model has produced no text for
+    hedge_after seconds, or straight away if model fails. Whichever request
+    produces text first wins and the other is cancelled.
+    """
+    updates = queue.Queue()
+    cancels, started, ended = {}, {}, set()
+    
+    def run(name):
+        try:
+            for chunk in stream_summary(summary_text, instruction_prompt, api_key, name, cancels[name]):
+                updates.put((name, chunk))
+        finally:
+            updates.put((name, None))
+    
+    def start(name):
+        cancels[name] = threading.Event()
+        started[name] = time.monotonic()
+        threading.Thread(target=run, args=(name,), name="hedged-summary", daemon=True).start()
+    
+    start(model)
+    deadline = time.monotonic() + hedge_after
+    winner, failure, running = None, None, 1
+    try:
+        while True:
+            hedging = winner is None and backup_model is not None and backup_model not in cancels
+            if not running and not hedging:
+                break
+            try:
+                name, chunk = updates.get(timeout=max(deadline - time.monotonic(), 0) if hedging else None)
+            except queue.Empty:
+                get_metrics().inc('hedged_requests')
+                start(backup_model)
+                running += 1
+                continue
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            
+            if chunk is None:
+                running -= 1
+                ended.add(name)
+                if name == winner:
+                    return
+                if hedging:
+                    deadline = time.monotonic()  # ended without text, so fail over now
+            elif winner is None:
+                if SUMMARY_ERROR in chunk:
+                    failure = chunk
+                    ended.add(name)
+                    continue
+                winner = name
+                if name != model:
+                    get_metrics().inc('hedge_wins')
+                for other, other_cancel in cancels.items():
+                    if other != winner and other not in ended:
+                        # The loser's first token is at least this late
+                        get_usage_ledger().record_first_token(other, time.monotonic() - started[other])
+                        other_cancel.set()
+                yield chunk
+            elif name == winner:
+                yield chunk
+        if failure is not None:
+            yield failure
+    finally:
+        for other_cancel in cancels.values():
+            other_cancel.set()
+
+def summarize_papers_concurrently(papers, instruction_prompt, api_key, model, max_workers=4,
+                                  stream=False, cancel_event=None, backup_model=None, hedge_after=HEDGE_AFTER):
+    """Summarize papers in parallel, yielding (index, text, done) as summaries arrive.
+    
+    cancel_event is forwarded to the streaming requests. With a backup_model
+    every request is hedged, see hedged_summary().
+    """
+    def run(index, paper, report):
+        try:
+            if backup_model is not None:
+                chunks = hedged_summary(paper.summary, instruction_prompt, api_key, model,
+                                        backup_model, hedge_after, cancel_event)
+                if stream:
+                    for chunk in chunks:
+                        report(index, chunk)
+                else:
+                    report(index, "".join(chunks))
+            elif stream:
+                for chunk in stream_summary(paper.summary, instruction_prompt, api_key, model, cancel_event):
+                    report(index, chunk)
+            else:
+                report(index, summarize_paper(paper.summary, instruction_prompt, api_key, model))
+        finally:
+            report(index, None)
+    
+    tasks = [partial(run, i, paper) for i, paper in enumerate(papers)]
+    return run_summary_tasks(tasks, len(papers), max_workers)
+
+def plan_summary_batches(abstracts, instruction_prompt, model):
+    """Split abstracts into batches, as lists of positions, that fit the model's limits.
+    
+    A batch is bounded by the output needed for its summaries and by the
+    context window left for the abstracts themselves.
+    """
+    context_window, max_output_tokens = MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)
+    per_paper_tokens = summary_max_tokens(instruction_prompt, model)
+    max_papers = max(1, min(SUMMARY_BATCH_MAX_PAPERS, max_output_tokens // per_paper_tokens))
+    input_budget = (context_window - max_papers * per_paper_tokens
+                    - count_tokens(instruction_prompt, model) - SUMMARY_BATCH_PROMPT_TOKENS)
+    
+    batches, batch, used = [], [], 0
+    for position, abstract in enumerate(abstracts):
+        # Abstracts are trimmed to SUMMARY_ABSTRACT_MAX_TOKENS, plus the "Paper n:" header
+        tokens = min(count_tokens(abstract, model), SUMMARY_ABSTRACT_MAX_TOKENS) + 10
+        if batch and (len(batch) == max_papers or used + tokens > input_budget):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(position)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def build_batch_prompt(abstracts, instruction_prompt, model=None):
+    """Prompt asking for a JSON list of analyses, one per abstract"""
+    papers_text = "\n\n".join(
+        f"Paper {number}:\n{trim_to_tokens(' '.join(abstract.split()), SUMMARY_ABSTRACT_MAX_TOKENS, model)}"
+        for number, abstract in enumerate(abstracts, 1)
+    )
+    return f"""{instruction_prompt.strip()}
+
+For each research paper abstract below, provide a structured analysis covering:
+1. Main contribution and novelty
+2. Methodology used
+3. Key findings
+4. Potential impact
+
+Reply with only a JSON object of the form {{"summaries": [{{"paper": 1, "summary": "..."}}]}} with one entry for each of the {len(abstracts)} papers.
+
+{papers_text}
+"""
+
+def parse_batch_summaries(content, count):
+    """Per-paper summaries from a batched JSON reply, with None for papers it left out"""
+    summaries = [None] * count
+    start, end = content.find("{"), content.rfind("}")
+    if start == -1 or end < start:
+        return summaries
+    try:
+        data = json.loads(content[start:end + 1])
+    except ValueError:
+        return summaries
+    
+    items = data.get('summaries') if isinstance(data, dict) else None
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        number, summary = item.get('paper'), item.get('summary')
+        if isinstance(number, int) and 1 <= number <= count and isinstance(summary, str) and summary.strip():
+            summaries[number - 1] = summary.strip()
+    return summaries
+
+def summarize_batch(abstracts, instruction_prompt, api_key, model):
+    """Summarize several abstracts in one request. Returns one summary or None per abstract."""
+    prompt = build_batch_prompt(abstracts, instruction_prompt, model)
+    max_output_tokens = MODEL_LIMITS.get(model, DEFAULT_MODEL_LIMITS)[1]
+    started = time.monotonic()
+    completion = create_completion(
+        api_key,
+        model=model,
+        messages=[{
+            "role": "user",
+            "content": prompt
+        }],
+        temperature=SUMMARY_TEMPERATURE,
+        max_tokens=min(max_output_tokens, summary_max_tokens(instruction_prompt, model) * len(abstracts))
+    )
+    content = completion.choices[0].message.content or ""
+    record_usage(model, completion.usage, prompt, content, started)
+    return parse_batch_summaries(content, len(abstracts))
+
+def summarize_papers_batched(papers, instruction_prompt, api_key, model, max_workers=4, cancel_event=None):
+    """Summarize papers several to a request, yielding (index, text, done) as batches complete.
+    
+    Cached summaries are reported straight away. The remaining papers are
+    packed into batches sized for the model, and any paper whose summary
+    can't be read from the batch reply falls back to a request of its own.
+    Once cancel_event is set no further request is started.
+    """
+    cache = get_summary_cache()
+    
+    def report_cached(index, summary, report):
+        report(index, summary)
+        report(index, None)
+    
+    def run_batch(indices, report):
+        if cancel_event is not None and cancel_event.is_set():
+            for index in indices:
+                report(index, None)
+            return
+        try:
+            summaries = summarize_batch([papers[i].summary for i in indices], instruction_prompt, api_key, model)
+        except Exception as e:
+            if is_upstream_failure(e):
+                get_usage_ledger().record_error(model)
+            summaries = [None] * len(indices)
+        for index, summary in zip(indices, summaries):
+            try:
+                if summary:
+                    cache.set(summary_cache_key(papers[index].summary, instruction_prompt, model), summary)
+                elif cancel_event is None or not cancel_event.is_set():
+                    summary = summarize_paper(papers[index].summary, instruction_prompt, api_key, model)
+            except Exception as e:
+                summary = summary or f"{SUMMARY_ERROR}: {str(e)}"
+            report(index, summary)
+            report(index, None)
+    
+    tasks, uncached = [], []
+    for i, paper in enumerate(papers):
+        cached_summary = cache.get(summary_cache_key(paper.summary, instruction_prompt, model))
+        if cached_summary is not None:
+            tasks.append(partial(report_cached, i, cached_summary))
+        else:
+            uncached.append(i)
+    for batch in plan_summary_batches([papers[i].summary for i in uncached], instruction_prompt, model):
+        tasks.append(partial(run_batch, [uncached[position] for position in batch]))
+    return run_summary_tasks(tasks, len(papers), max_workers)
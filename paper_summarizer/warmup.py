@@ -0,0 +1,189 @@
+"""Summaries of arXiv's newest submissions, computed before anyone searches for them.
+
+Run it on a schedule with the same cache directory as the app, for example
+from cron ahead of the morning rush:
+
+    30 6 * * 1-5  OPENROUTER_API_KEY=... python -m paper_summarizer.warmup --budget 0.50
+
+Each run pulls the latest submissions to the configured categories
+(sortBy=submittedDate) and summarizes them with the app's default
+instructions and model into the summary cache, so a search that turns them
+up later is answered from the cache. Papers are taken newest first and in
+turn from each category, and those already cached are skipped for free.
+
+Before a request is sent, its worst case (the prompt plus the whole
+completion budget at MODEL_PRICES) is reserved against the run's budget.
+Once the summary arrives the reservation is settled at the cost of the
+tokens the provider reports, so a run stays within its budget unless a
+request costs more than its worst case, which is logged. The run stops at
+the first paper that no longer fits and leaves the rest for the next one.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import zip_longest
+
+from .arxiv import arxiv_category_params, get_paper_store, iter_topic_papers
+from .settings import (
+    DEFAULT_INSTRUCTIONS, DEFAULT_MODEL, DEFAULT_MODEL_PRICES, MODEL_PRICES, SUMMARY_ERROR, WARMUP_BUDGET,
+    WARMUP_CATEGORIES, WARMUP_PAPERS_PER_CATEGORY
+)
+from .summaries import (
+    build_summary_prompt, count_tokens, get_openrouter_client, get_summary_cache, summarize_paper_with_usage,
+    summary_cache_key, summary_max_tokens
+)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m paper_summarizer.warmup",
+        description="Summarize the newest arXiv submissions into the summary cache within a spend budget."
+    )
+    parser.add_argument("--category", action="append",
+                        help=f"arXiv category; repeat for several (default: {','.join(WARMUP_CATEGORIES)})")
+    parser.add_argument("--n", type=int, default=WARMUP_PAPERS_PER_CATEGORY,
+                        help=f"newest submissions considered per category (default: {WARMUP_PAPERS_PER_CATEGORY})")
+    parser.add_argument("--budget", type=float, default=WARMUP_BUDGET,
+                        help=f"most US dollars the run may spend (default: {WARMUP_BUDGET:.2f})")
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        help=f"OpenRouter model; the app only finds summaries made with its own (default: {DEFAULT_MODEL})")
+    parser.add_argument("--instructions", default=DEFAULT_INSTRUCTIONS,
+                        help="summary instructions; the app only finds summaries made with its own (default: the app's)")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel summary requests (default: 4)")
+    parser.add_argument("--api-key", default=os.environ.get("OPENROUTER_API_KEY"),
+                        help="OpenRouter API key (default: $OPENROUTER_API_KEY)")
+    args = parser.parse_args(argv)
+    args.category = args.category or WARMUP_CATEGORIES
+    if not args.api_key:
+        parser.error("an OpenRouter API key is required: pass --api-key or set OPENROUTER_API_KEY")
+    return args
+
+
+def request_cost(model, prompt_tokens, completion_tokens):
+    """US dollars OpenRouter charges for a request with these token counts"""
+    prompt_price, completion_price = MODEL_PRICES.get(model, DEFAULT_MODEL_PRICES)
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+
+class SpendBudget:
+    """Dollars a run may spend, reserved before each request and settled after it"""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.spent = 0.0
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+    
+    def reserve(self, amount):
+        """Set amount aside if it still fits in the budget; False if it doesn't"""
+        with self._lock:
+            if self.spent + self.reserved + amount > self.limit:
+                return False
+            self.reserved += amount
+            return True
+    
+    def settle(self, reserved, cost):
+        """Replace a reservation with what the request cost. Returns how far the cost overran it."""
+        with self._lock:
+            self.reserved -= reserved
+            self.spent += cost
+            return max(cost - reserved, 0.0)
+
+
+def fetch_latest(categories, per_category):
+    """Newest submissions to each category, interleaved so every category gets its newest papers in first.
+    
+    Papers cross-listed in several categories appear once. They are also
+    added to the local paper store. Returns the papers and the error of every
+    category whose fetch failed.
+    """
+    feeds, errors = [], {}
+    store = get_paper_store()
+    for category in categories:
+        try:
+            papers = list(iter_topic_papers(category, per_category, query_params=arxiv_category_params))
+        except Exception as e:
+            errors[category] = e
+            continue
+        store.add(papers, f"cat:{category}")
+        feeds.append(papers)
+    
+    latest, seen = [], set()
+    for papers in zip_longest(*feeds):
+        for paper in papers:
+            if paper is not None and paper.arxiv_id not in seen:
+                seen.add(paper.arxiv_id)
+                latest.append(paper)
+    return latest, errors
+
+
+def run(args, papers):
+    """Summarize papers into the cache within args.budget. Returns the counts and the budget."""
+    budget = SpendBudget(args.budget)
+    cache = get_summary_cache()
+    max_tokens = summary_max_tokens(args.instructions, args.model)
+    counts = {"summarized": 0, "cached": 0, "failed": 0, "over_budget": 0}
+    
+    def is_cached(paper):
+        return cache.get(summary_cache_key(paper.summary, args.instructions, args.model)) is not None
+    
+    def summarize(paper, reserved, prompt_tokens):
+        try:
+            summary, usage = summarize_paper_with_usage(paper.summary, args.instructions, args.api_key, args.model)
+        except Exception as e:
+            summary, usage = f"{SUMMARY_ERROR}: {str(e)}", None
+        # A failed request may still have been billed for its prompt
+        cost = request_cost(args.model, *usage) if usage is not None else request_cost(args.model, prompt_tokens, 0)
+        overrun = budget.settle(reserved, cost)
+        if overrun:
+            print(f"{paper.arxiv_id} cost ${cost:.6f}, ${overrun:.6f} more than its worst case", file=sys.stderr)
+        return "failed" if not summary or summary.startswith(SUMMARY_ERROR) else "summarized"
+    
+    def tally(futures):
+        for future in futures:
+            counts[future.result()] += 1
+    
+    pending = set()
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="warmup") as executor:
+        executor.submit(get_openrouter_client, args.api_key)
+        for index, paper in enumerate(papers):
+            if is_cached(paper):
+                counts["cached"] += 1
+                continue
+            prompt_tokens = count_tokens(build_summary_prompt(paper.summary, args.instructions, args.model), args.model)
+            worst_case = request_cost(args.model, prompt_tokens, max_tokens)
+            reserved = budget.reserve(worst_case)
+            while not reserved and pending:
+                # Finished requests hand back the part of their reservation they didn't use
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                tally(done)
+                reserved = budget.reserve(worst_case)
+            if not reserved:
+                counts["over_budget"] = sum(not is_cached(later) for later in papers[index:])
+                break
+            pending.add(executor.submit(summarize, paper, worst_case, prompt_tokens))
+        tally(wait(pending).done)
+    return counts, budget
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.monotonic()
+    papers, errors = fetch_latest(args.category, args.n)
+    for category, error in errors.items():
+        print(f"Error fetching {category}: {error}", file=sys.stderr)
+    counts, budget = run(args, papers)
+    print(
+        f"{len(papers)} recent papers: {counts['summarized']} summarized, "
+        f"{counts['cached']} already cached, {counts['failed']} failed, {counts['over_budget']} left for a later run; "
+        f"about ${budget.spent:.4f} of ${budget.limit:.2f} spent in {time.monotonic() - started:.1f}s",
+        file=sys.stderr
+    )
+    return 1 if counts["failed"] or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,35 @@
 import streamlit as st
-import requests
-import xml.etree.ElementTree as ET
-from openai import OpenAI
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from string import Template
+import html
+import os
+import re
+import threading
 import time
+import uuid
+
+from paper_summarizer import (
+    PaperBatch, api_key_fingerprint, cached_search_papers, get_arxiv_client, get_circuit_breakers,
+    get_connection_tracker, get_metrics, get_paper_store, get_rate_limiters, get_search_cache, get_single_flights,
+    get_summary_cache, get_usage_ledger, harvest_checkpoint_path, harvest_papers, normalize_topic, plan_summary_batches,
+    search_topics, start_metrics_server, summarize_papers_batched, summarize_papers_concurrently, summary_cache_key
+)
+from paper_summarizer.settings import (
+    DEFAULT_INSTRUCTIONS, DEFAULT_MODEL, HARVEST_MAX_RESULTS, HEDGE_AFTER, METRICS_FILE, METRICS_PORT, SUMMARY_ERROR
+)
+
+# Settings
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+SESSION_MAX_QUERIES = 10
+SESSION_MAX_SUMMARIES = 200
+LAZY_PREFETCH = 2  # cards after the requested one to summarize speculatively
+SUMMARY_JOB_WORKERS = 8
+SUMMARY_POLL_INTERVAL = 0.5  # seconds between progress checks of a card's summary job
+MULTI_TOPIC_MAX_TOPICS = 50
+MULTI_TOPIC_MAX_PAPERS = 100  # best-ranked papers of a multi-topic search kept on the page
+MULTI_TOPIC_EAGER_SUMMARIES = 20  # of those, summarized straight away; the rest on demand
 
 # Page configuration
 st.set_page_config(
@@ -12,527 +39,58 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Modern Academic Theme CSS
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&family=Space+Grotesk:wght@400;500;600;700&display=swap');
-    
-    .main {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        min-height: 100vh;
-        font-family: 'Inter', sans-serif;
-    }
-    
-    .stApp {
-        background: transparent;
-    }
-    
-    /* Main Container */
-    .main-container {
-        background: rgba(255, 255, 255, 0.95);
-        backdrop-filter: blur(20px);
-        border-radius: 24px;
-        margin: 2rem auto;
-        max-width: 1400px;
-        box-shadow: 0 20px 40px rgba(0, 0, 0, 0.1);
-        border: 1px solid rgba(255, 255, 255, 0.2);
-        overflow: hidden;
-    }
-    
-    /* Hero Section */
-    .hero-section {
-        background: linear-gradient(135deg, #1e3a8a 0%, #3730a3 50%, #581c87 100%);
-        color: white;
-        text-align: center;
-        padding: 3rem 2rem;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .hero-section::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        bottom: 0;
-        background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><defs><pattern id="grid" width="10" height="10" patternUnits="userSpaceOnUse"><path d="M 10 0 L 0 0 0 10" fill="none" stroke="rgba(255,255,255,0.1)" stroke-width="0.5"/></pattern></defs><rect width="100" height="100" fill="url(%23grid)"/></svg>');
-        opacity: 0.3;
-    }
-    
-    .hero-content {
-        position: relative;
-        z-index: 2;
-        max-width: 800px;
-        margin: 0 auto;
-    }
-    
-    .hero-badge {
-        display: inline-block;
-        background: rgba(255, 255, 255, 0.2);
-        color: rgba(255, 255, 255, 0.9);
-        padding: 0.5rem 1.5rem;
-        border-radius: 50px;
-        font-size: 0.8rem;
-        font-weight: 600;
-        letter-spacing: 0.1em;
-        text-transform: uppercase;
-        margin-bottom: 2rem;
-        border: 1px solid rgba(255, 255, 255, 0.3);
-        backdrop-filter: blur(10px);
-    }
-    
-    .hero-title {
-        font-family: 'Space Grotesk', sans-serif;
-        font-size: 3.5rem;
-        font-weight: 700;
-        line-height: 1.1;
-        margin-bottom: 1.5rem;
-        background: linear-gradient(135deg, #ffffff 0%, #e0e7ff 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .hero-subtitle {
-        font-size: 1.2rem;
-        line-height: 1.6;
-        color: rgba(255, 255, 255, 0.9);
-        font-weight: 400;
-        max-width: 600px;
-        margin: 0 auto;
-    }
-    
-    /* Search Section */
-    .search-section {
-        background: white;
-        padding: 3rem 2rem 2rem 2rem;
-    }
-    
-    .search-container {
-        max-width: 800px;
-        margin: 0 auto;
-    }
-    
-    .search-header {
-        text-align: center;
-        margin-bottom: 2rem;
-    }
-    
-    .search-title {
-        font-family: 'Space Grotesk', sans-serif;
-        font-size: 1.8rem;
-        font-weight: 600;
-        color: #1e293b;
-        margin-bottom: 0.5rem;
-    }
-    
-    .search-description {
-        color: #64748b;
-        font-size: 1rem;
-        line-height: 1.5;
-    }
-    
-    .search-form {
-        display: flex;
-        gap: 1rem;
-        margin-top: 2rem;
-        background: #f8fafc;
-        padding: 1rem;
-        border-radius: 16px;
-        border: 2px solid #e2e8f0;
-        transition: all 0.3s ease;
-    }
-    
-    .search-form:focus-within {
-        border-color: #3b82f6;
-        box-shadow: 0 0 0 4px rgba(59, 130, 246, 0.1);
-    }
-    
-    .search-input-wrapper {
-        flex: 1;
-    }
-    
-    .search-button-wrapper {
-        flex-shrink: 0;
-    }
-    
-    /* Paper Cards */
-    .papers-section {
-        background: #f8fafc;
-        padding: 2rem;
-        min-height: 200px;
-    }
-    
-    .paper-card {
-        background: white;
-        border-radius: 20px;
-        padding: 2.5rem;
-        margin: 2rem auto;
-        max-width: 1200px;
-        box-shadow: 0 10px 30px rgba(0, 0, 0, 0.08);
-        border: 1px solid #e2e8f0;
-        transition: all 0.3s ease;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .paper-card::before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: 0;
-        right: 0;
-        height: 4px;
-        background: linear-gradient(90deg, #3b82f6, #8b5cf6, #ec4899);
-    }
-    
-    .paper-card:hover {
-        transform: translateY(-4px);
-        box-shadow: 0 20px 40px rgba(0, 0, 0, 0.12);
-    }
-    
-    .paper-header {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        margin-bottom: 2rem;
-        padding-bottom: 1.5rem;
-        border-bottom: 1px solid #f1f5f9;
-    }
-    
-    .paper-number {
-        background: linear-gradient(135deg, #3b82f6, #8b5cf6);
-        color: white;
-        padding: 0.5rem 1rem;
-        border-radius: 12px;
-        font-size: 0.9rem;
-        font-weight: 600;
-        box-shadow: 0 4px 12px rgba(59, 130, 246, 0.3);
-    }
-    
-    .paper-title {
-        font-family: 'Space Grotesk', sans-serif;
-        font-size: 1.6rem;
-        font-weight: 600;
-        color: #1e293b;
-        line-height: 1.4;
-        margin-bottom: 1.5rem;
-    }
-    
-    .paper-meta {
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        margin-bottom: 0.75rem;
-        color: #64748b;
-        font-size: 0.95rem;
-    }
-    
-    .paper-meta-icon {
-        display: flex;
-        align-items: center;
-        justify-content: center;
-        width: 24px;
-        height: 24px;
-        background: #f1f5f9;
-        border-radius: 6px;
-        font-size: 0.8rem;
-    }
-    
-    .paper-meta strong {
-        color: #374151;
-        font-weight: 600;
-    }
-    
-    /* Content Grid */
-    .content-grid {
-        display: grid;
-        grid-template-columns: 1fr 1fr;
-        gap: 2rem;
-        margin-top: 2rem;
-    }
-    
-    .content-box {
-        background: #f8fafc;
-        border-radius: 16px;
-        padding: 2rem;
-        border: 1px solid #e2e8f0;
-        position: relative;
-        transition: all 0.3s ease;
-    }
-    
-    .content-box:hover {
-        border-color: #cbd5e1;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.05);
-    }
-    
-    .abstract-box {
-        border-left: 4px solid #3b82f6;
-    }
-    
-    .summary-box {
-        border-left: 4px solid #8b5cf6;
-    }
-    
-    .warning-box {
-        border-left: 4px solid #f59e0b;
-        background: #fffbeb;
-    }
-    
-    .content-header {
-        display: flex;
-        align-items: center;
-        gap: 0.75rem;
-        font-weight: 600;
-        color: #1e293b;
-        margin-bottom: 1.5rem;
-        font-size: 1.1rem;
-    }
-    
-    .content-text {
-        color: #475569;
-        line-height: 1.7;
-        font-size: 0.95rem;
-        max-height: 300px;
-        overflow-y: auto;
-        padding-right: 0.5rem;
-    }
-    
-    /* Buttons */
-    .stButton > button {
-        background: linear-gradient(135deg, #3b82f6 0%, #8b5cf6 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 0.875rem 2rem !important;
-        font-family: 'Inter', sans-serif !important;
-        font-weight: 600 !important;
-        font-size: 1rem !important;
-        transition: all 0.3s ease !important;
-        width: 100% !important;
-        height: 52px !important;
-        box-shadow: 0 4px 16px rgba(59, 130, 246, 0.3) !important;
-        cursor: pointer !important;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 8px 24px rgba(59, 130, 246, 0.4) !important;
-    }
-    
-    /* Input Fields */
-    .stTextInput > div > div > input {
-        background: white !important;
-        border: 2px solid #e2e8f0 !important;
-        border-radius: 12px !important;
-        color: #1e293b !important;
-        font-family: 'Inter', sans-serif !important;
-        height: 52px !important;
-        font-size: 1rem !important;
-        padding: 0 1rem !important;
-        transition: all 0.3s ease !important;
-    }
-    
-    .stTextInput > div > div > input:focus {
-        border-color: #3b82f6 !important;
-        box-shadow: 0 0 0 4px rgba(59, 130, 246, 0.1) !important;
-        outline: none !important;
-    }
-    
-    .stTextInput > div > div > input::placeholder {
-        color: #94a3b8 !important;
-        font-weight: 400 !important;
-    }
-    
-    /* Sidebar */
-    .css-1d391kg {
-        background: linear-gradient(180deg, #1e293b 0%, #334155 100%) !important;
-        color: white !important;
-    }
-    
-    .css-1d391kg .stMarkdown {
-        color: white !important;
-    }
-    
-    .css-1d391kg .stSelectbox label,
-    .css-1d391kg .stTextInput label,
-    .css-1d391kg .stTextArea label,
-    .css-1d391kg .stSlider label {
-        color: #e2e8f0 !important;
-        font-weight: 500 !important;
-    }
-    
-    /* Status Messages */
-    .stSuccess {
-        background: linear-gradient(135deg, #10b981, #059669) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 1rem !important;
-        font-weight: 500 !important;
-    }
-    
-    .stWarning {
-        background: linear-gradient(135deg, #f59e0b, #d97706) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 1rem !important;
-        font-weight: 500 !important;
-    }
-    
-    .stError {
-        background: linear-gradient(135deg, #ef4444, #dc2626) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        padding: 1rem !important;
-        font-weight: 500 !important;
-    }
-    
-    /* Loading Spinner */
-    .stSpinner {
-        color: #3b82f6 !important;
-    }
-    
-    /* Scrollbar */
-    .content-text::-webkit-scrollbar {
-        width: 8px;
-    }
-    
-    .content-text::-webkit-scrollbar-track {
-        background: #f1f5f9;
-        border-radius: 4px;
-    }
-    
-    .content-text::-webkit-scrollbar-thumb {
-        background: #cbd5e1;
-        border-radius: 4px;
-    }
-    
-    .content-text::-webkit-scrollbar-thumb:hover {
-        background: #94a3b8;
-    }
-    
-    /* Empty State */
-    .empty-state {
-        text-align: center;
-        padding: 3rem 2rem;
-        color: #64748b;
-        background: white;
-        border-radius: 20px;
-        margin: 2rem auto;
-        max-width: 600px;
-        box-shadow: 0 4px 12px rgba(0, 0, 0, 0.05);
-        border: 1px solid #e2e8f0;
-    }
-    
-    .empty-state-icon {
-        font-size: 4rem;
-        margin-bottom: 1rem;
-        opacity: 0.6;
-    }
-    
-    .empty-state-title {
-        font-family: 'Space Grotesk', sans-serif;
-        font-size: 1.5rem;
-        font-weight: 600;
-        color: #475569;
-        margin-bottom: 0.5rem;
-    }
-    
-    .empty-state-description {
-        font-size: 1rem;
-        line-height: 1.6;
-        max-width: 400px;
-        margin: 0 auto;
-    }
-    
-    /* Results container */
-    .results-container {
-        background: #f8fafc;
-        min-height: auto;
-    }
-    
-    /* Responsive Design */
-    @media (max-width: 768px) {
-        .hero-title {
-            font-size: 2.5rem;
-        }
-        
-        .content-grid {
-            grid-template-columns: 1fr;
-            gap: 1.5rem;
-        }
-        
-        .search-form {
-            flex-direction: column;
-        }
-        
-        .main-container {
-            margin: 1rem;
-            border-radius: 16px;
-        }
-        
-        .paper-card {
-            margin: 1rem auto;
-            padding: 1.5rem;
-        }
-        
-        .hero-section {
-            padding: 2rem 1rem;
-        }
-        
-        .search-section {
-            padding: 2rem 1rem 1.5rem 1rem;
-        }
-        
-        .papers-section {
-            padding: 1.5rem 1rem;
-        }
-    }
-    
-    /* Animations */
-    @keyframes fadeInUp {
-        from {
-            opacity: 0;
-            transform: translateY(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    .paper-card {
-        animation: fadeInUp 0.6s ease-out;
-    }
-    
-    /* Hide Streamlit default elements */
-    .stApp > header {
-        display: none;
-    }
-    
-    .stApp > div[data-testid="stDecoration"] {
-        display: none;
+# Static Assets
+def minify_css(css):
+    """Drop comments and the whitespace around CSS punctuation"""
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    return css.replace(";}", "}").strip()
+
+def compact_html(html):
+    """Strip indentation and blank lines so markdown never sees a code block"""
+    return "\n".join(line.strip() for line in html.splitlines() if line.strip())
+
+@st.cache_resource
+def load_assets():
+    """Read, compact and pre-compile the page's static CSS and HTML once per process"""
+    def read(name):
+        with open(os.path.join(ASSETS_DIR, name), encoding="utf-8") as f:
+            return f.read()
+    
+    return {
+        'style': f"<style>{minify_css(read('style.css'))}</style>",
+        'hero': compact_html(read('hero.html')),
+        'search_header': compact_html(read('search_header.html')),
+        'api_key_warning': compact_html(read('api_key_warning.html')),
+        'paper_card': Template(compact_html(read('paper_card.html'))),
+        'summary_box': Template(compact_html(read('summary_box.html')))
     }
-</style>
-""", unsafe_allow_html=True)
+
+def paper_card_html(number, paper, topics=()):
+    """HTML for a paper card with its header, metadata and abstract, plus the topics that found it in a multi-topic search"""
+    return load_assets()['paper_card'].substitute(
+        number=f"{number:02d}",
+        title=paper.title,
+        authors=', '.join(paper.authors[:3]) + ('...' if len(paper.authors) > 3 else ''),
+        published=paper.published,
+        arxiv_id=paper.arxiv_id.split('/')[-1],
+        topics=(
+            '<div class="paper-meta"><div class="paper-meta-icon">🏷️</div>'
+            f'<strong>Topics:</strong> {html.escape(", ".join(topics))}</div>'
+        ) if topics else "",
+        abstract=paper.summary
+    )
+
+# Modern Academic Theme CSS
+st.markdown(load_assets()['style'], unsafe_allow_html=True)
 
 # Main Container Start
 st.markdown('<div class="main-container">', unsafe_allow_html=True)
 
 # Hero Section
-st.markdown("""
-<div class="hero-section">
-    <div class="hero-content">
-        <div class="hero-badge">✨ AI-Powered Research Assistant</div>
-        <h1 class="hero-title">Research Paper Summarizer</h1>
-        <p class="hero-subtitle">Transform complex academic research into clear, actionable insights using advanced AI technology. Discover, analyze, and understand scientific literature more efficiently than ever before.</p>
-    </div>
-</div>
-""", unsafe_allow_html=True)
+st.markdown(load_assets()['hero'], unsafe_allow_html=True)
 
 # Sidebar Configuration
 st.sidebar.markdown("### ⚙️ Configuration")
@@ -551,228 +109,486 @@ model_options = [
     "openai/gpt-3.5-turbo",
     "meta-llama/llama-3-8b-instruct"
 ]
-selected_model = st.sidebar.selectbox("AI Model", model_options, index=1)
+selected_model = st.sidebar.selectbox("AI Model", model_options, index=model_options.index(DEFAULT_MODEL))
+
+# Hedged requests
+hedge_requests = st.sidebar.checkbox(
+    "Hedge Slow Requests",
+    help="If the model hasn't started answering in time, ask the fastest healthy other model too and keep whichever answers first"
+)
+hedge_after = st.sidebar.slider("Backup After (seconds)", 1.0, 15.0, HEDGE_AFTER, 0.5, disabled=not hedge_requests)
 
 # Number of papers
 max_results = st.sidebar.slider("Papers to Analyze", 1, 10, 3)
 
+# Multi-topic search
+multi_topic = st.sidebar.checkbox(
+    "Multiple Topics",
+    help=(
+        f"Search one topic per line at once, with Papers to Analyze per topic; a paper found by several topics is shown "
+        f"and summarized once. The best-ranked {MULTI_TOPIC_EAGER_SUMMARIES} are summarized straight away, the rest on demand"
+    )
+)
+
+# Concurrent AI requests
+max_concurrency = st.sidebar.slider(
+    "Parallel AI Requests", 1, SUMMARY_JOB_WORKERS, 4,
+    help="Maximum number of papers summarized at the same time"
+)
+
+# Summarization mode
+summary_modes = ["Streaming", "One request per paper", "Batched"]
+summary_mode = st.sidebar.radio(
+    "Summarization Mode", summary_modes,
+    help="Streaming shows each analysis as it is written; Batched packs several abstracts into each request to cut request count and repeated prompt tokens"
+)
+
+# On-demand summaries
+lazy_summaries = st.sidebar.checkbox(
+    "Summarize on Demand",
+    help=f"Show abstracts first and summarize a paper when you ask for it, along with the next {LAZY_PREFETCH}, to save requests on papers you skip"
+)
+
 # Custom instructions
 instruction_prompt = st.sidebar.text_area(
     "Analysis Instructions",
-    value="You are an expert research analyst. Provide a clear, comprehensive summary under 100 words highlighting key findings, methodology, and significance.",
+    value=DEFAULT_INSTRUCTIONS,
     height=100
 )
 
 # Search Section
-st.markdown("""
-<div class="search-section">
-    <div class="search-container">
-        <div class="search-header">
-            <h2 class="search-title">Search Research Papers</h2>
-            <p class="search-description">Enter your research topic to discover and analyze relevant academic papers from arXiv</p>
-        </div>
-        <div class="search-form">
-""", unsafe_allow_html=True)
+st.markdown(load_assets()['search_header'], unsafe_allow_html=True)
 
 col1, col2 = st.columns([4, 1])
 
 with col1:
-    topic = st.text_input(
-        "",
-        placeholder="Enter research topic (e.g., machine learning, quantum computing, biotechnology...)",
-        label_visibility="collapsed"
-    )
+    if multi_topic:
+        topic_lines = st.text_area(
+            "",
+            placeholder="Enter one research topic per line (e.g., machine learning, quantum computing, biotechnology...)",
+            label_visibility="collapsed"
+        )
+        # Topics differing only in case or spacing are one search, as in the search cache, so
+        # they don't count twice in the ranking; the first spelling is the one shown
+        unique_topics = {}
+        for line in topic_lines.splitlines():
+            if line.strip():
+                unique_topics.setdefault(normalize_topic(line), line.strip())
+        topics = list(unique_topics.values())[:MULTI_TOPIC_MAX_TOPICS]
+        topic = "\n".join(topics)
+    else:
+        topic = st.text_input(
+            "",
+            placeholder="Enter research topic (e.g., machine learning, quantum computing, biotechnology...)",
+            label_visibility="collapsed"
+        )
+        topics = [topic] if topic else []
 
 with col2:
     search_button = st.button("🔍 Search", type="primary")
 
-st.markdown("""
-        </div>
-    </div>
-</div>
-""", unsafe_allow_html=True)
-
 # Functions
-@st.cache_data(ttl=300)
+@st.cache_resource
+def get_background_executor():
+    """Worker threads for background work that outlives a script run"""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="background")
+
 def scrape_papers(topic, max_results=1):
     """Scrape papers from arXiv"""
-    base_url = "http://export.arxiv.org/api/query"
-    params = {
-        'search_query': f'all:{topic}',
-        'start': 0,
-        'max_results': max_results,
-        'sortBy': 'relevance',
-        'sortOrder': 'descending'
-    }
-    
     try:
-        response = requests.get(base_url, params=params, timeout=15)
-        response.raise_for_status()
-        root = ET.fromstring(response.content)
-        ns = {'atom': 'http://www.w3.org/2005/Atom'}
-        
-        papers = []
-        for entry in root.findall('atom:entry', ns):
-            title = entry.find('atom:title', ns).text.strip().replace('\n', ' ')
-            authors = [author.find('atom:name', ns).text for author in entry.findall('atom:author', ns)]
-            summary = entry.find('atom:summary', ns).text.strip().replace('\n', ' ')
-            arxiv_id = entry.find('atom:id', ns).text
-            
-            # Extract publication date
-            published = entry.find('atom:published', ns)
-            pub_date = published.text[:10] if published is not None else "Unknown"
-            
-            papers.append({
-                'title': title,
-                'authors': authors,
-                'summary': summary,
-                'arxiv_id': arxiv_id,
-                'published': pub_date
-            })
-        
-        return papers
+        return cached_search_papers(topic, max_results)
     except Exception as e:
         st.error(f"Error fetching papers: {str(e)}")
-        return []
+        return PaperBatch()
 
-def summarize_paper(summary_text, instruction_prompt, api_key, model):
-    """Summarize paper using AI"""
-    if not api_key:
-        return "Please provide an API key to generate summaries."
-    
+def refresh_index(topic, max_results):
+    """Refresh the local index from arXiv on a background thread, where st.error can't reach the page"""
     try:
-        client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-        )
-        
-        enhanced_prompt = f"""
-        {instruction_prompt}
-        
-        Research Paper Abstract:
-        {summary_text}
+        cached_search_papers(topic, max_results)
+    except Exception:
+        get_metrics().inc('index_refresh_errors')
+
+class SummaryJob:
+    """Progress of one paper's summary, shared by every session waiting for it"""
+    __slots__ = ('key', 'text', 'done', 'started', 'time_to_text', 'elapsed', 'waiters', 'cancel_event', 'unit')
+    
+    def __init__(self, key):
+        self.key = key
+        self.text = ""
+        self.done = False
+        self.started = time.monotonic()
+        self.time_to_text = None
+        self.elapsed = None
+        self.waiters = set()
+        self.cancel_event = None
+        self.unit = ()  # jobs answered by the same request, sharing cancel_event
+
+class SummaryJobQueue:
+    """Summarization jobs run on a worker pool, off the Streamlit script thread.
+    
+    Jobs are keyed by summary cache key and API key, so sessions asking for
+    the same abstract, instructions and model with the same key share one
+    in-flight job. A job leaves the queue when it finishes; from then on the
+    summary cache serves it.
+    
+    Each submit() replaces the jobs its session waits on. Once a new search
+    or a changed setting leaves a job with no session waiting, it is
+    cancelled: skipped if it hasn't started, its stream closed if it has.
+    Work reaches the pool one paper, or one batched request, at a time, so
+    abandoned searches can't hold workers that other sessions are waiting for.
+    """
+    
+    def __init__(self, max_workers=SUMMARY_JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="summary-job")
+        self._jobs = {}
+        self._waiting = {}  # session -> keys of the jobs it waits on
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.joined = 0
+        self.cancelled = 0
+    
+    def submit(self, session, keys, papers, start, plan=None, max_parallel=4):
+        """Jobs for the given summary keys, starting the ones not already running.
         
-        Please provide a structured analysis covering:
-        1. Main contribution and novelty
-        2. Methodology used
-        3. Key findings
-        4. Potential impact
+        The keys replace whatever session waited on before. start(papers,
+        cancel_event=event) is called on a worker with the papers of one unit
+        of work and must yield (position, text, done) like
+        summarize_papers_concurrently. plan(abstracts), if given, groups the
+        papers that need a new job into units as lists of positions, like
+        plan_summary_batches; otherwise each paper is a unit. At most
+        max_parallel units of one submit() run at once.
         """
+        with self._lock:
+            self._release(session, set(keys))
+            jobs = [self._jobs.get(key) for key in keys]
+            new = [i for i, job in enumerate(jobs) if job is None]
+            # Only a job another session started counts as joined, not this session's own on a rerun
+            self.joined += sum(job is not None and session not in job.waiters for job in jobs)
+            for i in new:
+                jobs[i] = self._jobs[keys[i]] = SummaryJob(keys[i])
+            for job in jobs:
+                job.waiters.add(session)
+            if keys:
+                self._waiting[session] = set(keys)
+            self.submitted += len(new)
+            
+            units = deque()
+            if plan and new:
+                groups = plan([papers[i].summary for i in new])
+            else:
+                groups = [[position] for position in range(len(new))]
+            for group in groups:
+                unit = [jobs[new[position]] for position in group]
+                cancel_event = threading.Event()
+                for job in unit:
+                    job.cancel_event, job.unit = cancel_event, unit
+                units.append((unit, [papers[new[position]] for position in group]))
         
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[{
-                "role": "user",
-                "content": enhanced_prompt
-            }],
-            temperature=0.7,
-            max_tokens=500
-        )
+        def start_next():
+            try:
+                unit, unit_papers = units.popleft()
+            except IndexError:
+                return
+            self._executor.submit(self._run, unit, unit_papers, start, start_next)
         
-        return completion.choices[0].message.content
-    except Exception as e:
-        return f"Error generating summary: {str(e)}"
+        for _ in range(max(1, max_parallel)):
+            start_next()
+        return jobs
+    
+    def queued(self, keys):
+        """Those of keys that have a job in the queue"""
+        with self._lock:
+            return {key for key in keys if key in self._jobs}
+    
+    def release(self, session):
+        """Stop session waiting on any job"""
+        with self._lock:
+            self._release(session)
+    
+    def _release(self, session, keep=frozenset()):
+        for key in self._waiting.pop(session, set()) - keep:
+            job = self._jobs.get(key)
+            if job is None:
+                continue
+            job.waiters.discard(session)
+            if any(sibling.waiters for sibling in job.unit):
+                continue
+            # Nobody waits on this request any more; a later one starts afresh
+            job.cancel_event.set()
+            for sibling in job.unit:
+                if self._jobs.get(sibling.key) is sibling:
+                    del self._jobs[sibling.key]
+                    self.cancelled += 1
+    
+    def _run(self, jobs, papers, start, start_next):
+        cancel_event = jobs[0].cancel_event
+        try:
+            if not cancel_event.is_set():
+                for position, text, done in start(papers, cancel_event=cancel_event):
+                    if cancel_event.is_set():
+                        break
+                    job = jobs[position]
+                    if text and job.time_to_text is None:
+                        job.time_to_text = time.monotonic() - job.started
+                    job.text = text
+                    if done:
+                        job.elapsed = time.monotonic() - job.started
+                    job.done = done
+        except Exception as e:
+            for job in jobs:
+                if not job.done:
+                    job.text = f"{SUMMARY_ERROR}: {str(e)}"
+        finally:
+            for job in jobs:
+                if not job.done:
+                    if cancel_event.is_set():
+                        job.text = f"{SUMMARY_ERROR}: cancelled, search again to retry"
+                    job.elapsed = time.monotonic() - job.started
+                    job.done = True
+            with self._lock:
+                for job in jobs:
+                    if self._jobs.get(job.key) is job:
+                        del self._jobs[job.key]
+            start_next()
+    
+    def stats(self):
+        with self._lock:
+            running = len(self._jobs)
+        return {
+            'running': running,
+            'submitted': self.submitted,
+            'joined': self.joined,
+            'cancelled': self.cancelled
+        }
+
+@st.cache_resource
+def get_summary_jobs():
+    """Summary job queue shared by every session"""
+    return SummaryJobQueue()
+
+class SessionResults:
+    """Papers and summaries of recent searches, kept in session state across reruns.
+    
+    Papers are keyed by (topic, max_results) and summaries by their cache
+    key, so a new model or prompt only misses the summaries it changes.
+    A multi-topic search also keeps the topics that found each paper.
+    Failed summaries are shown until the next search, which retries them.
+    """
+    
+    def __init__(self, max_queries=SESSION_MAX_QUERIES, max_summaries=SESSION_MAX_SUMMARIES):
+        self.max_queries = max_queries
+        self.max_summaries = max_summaries
+        self.id = uuid.uuid4().hex  # identifies the session to the summary job queue
+        self.query = None
+        self._papers = OrderedDict()
+        self._summaries = OrderedDict()
+        self._requested = set()
+        self._failed = {}
+        self.timings = {}
+        self.summary_timings = []
+    
+    def set_papers(self, query, papers, timings=None, matched_topics=None):
+        """Store a search's papers and per-stage timings, and make it the one on display"""
+        self.query = query
+        self.timings = dict(timings or {})
+        self.summary_timings = []
+        self._failed.clear()
+        self._papers[query] = (papers, matched_topics)
+        self._papers.move_to_end(query)
+        while len(self._papers) > self.max_queries:
+            self._papers.popitem(last=False)
+    
+    def papers(self):
+        """Papers of the search on display, or None before the first search"""
+        return self._papers.get(self.query, (None, None))[0]
+    
+    def matched_topics(self):
+        """Topics that found each paper on display, or None unless it came from a multi-topic search"""
+        return self._papers.get(self.query, (None, None))[1]
+    
+    def request(self, arxiv_ids):
+        """Mark papers to be summarized in on-demand mode"""
+        self._requested.update(arxiv_ids)
+    
+    def is_requested(self, arxiv_id):
+        return arxiv_id in self._requested
+    
+    def get_summary(self, key):
+        summary = self._summaries.get(key)
+        if summary is not None:
+            self._summaries.move_to_end(key)
+            return summary
+        return self._failed.get(key)
+    
+    def set_summary(self, key, summary):
+        if not summary or SUMMARY_ERROR in summary:
+            self._failed[key] = summary or f"{SUMMARY_ERROR}: the model returned no text"
+            return
+        self._summaries[key] = summary
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.max_summaries:
+            self._summaries.popitem(last=False)
+
+def get_session_results():
+    """This session's result store"""
+    if 'results' not in st.session_state:
+        st.session_state['results'] = SessionResults()
+    return st.session_state['results']
+
+def summary_box_html(content):
+    """HTML for the AI Analysis box of a paper card"""
+    return load_assets()['summary_box'].substitute(content=content)
+
+@st.fragment(run_every=SUMMARY_POLL_INTERVAL)
+def summary_job_box(job, summary_key):
+    """AI Analysis box that polls a summary job, rerunning the page once it finishes"""
+    if job.done:
+        session_results = get_session_results()
+        session_results.set_summary(summary_key, job.text)
+        session_results.summary_timings.append((job.time_to_text, job.elapsed))
+        st.rerun()
+    st.markdown(
+        summary_box_html(job.text + " ▌" if job.text else "⏳ Generating AI analysis..."),
+        unsafe_allow_html=True
+    )
 
 # Results Container
 results_container = st.container()
 
 # Main Logic
+session_results = get_session_results()
 if search_button and topic:
-    if not api_key:
-        st.warning("⚠️ Please enter your OpenRouter API key in the sidebar to generate AI summaries.")
+    get_metrics().inc('searches')
+    matched_topics, from_index = None, False
+    with get_metrics().trace() as search_timings:
+        if multi_topic:
+            # One query per topic, merged so a paper several topics find is shown once
+            with st.spinner(f"🔍 Searching for papers on {len(topics)} topics..."):
+                papers, matched_topics, errors = search_topics(topics, max_results, search=cached_search_papers)
+            # The merge is ranked, so a long topic list keeps its best papers on the page
+            found, shared = len(papers), sum(len(found_by) > 1 for found_by in matched_topics)
+            papers, matched_topics = papers[:MULTI_TOPIC_MAX_PAPERS], matched_topics[:MULTI_TOPIC_MAX_PAPERS]
+            for failed_topic, error in errors.items():
+                st.error(f"Error fetching papers on '{failed_topic}': {str(error)}")
+        else:
+            # Answer from the local index when it already has enough matches, and
+            # refresh it from arXiv in the background for the next search
+            with get_metrics().timer('index_search'):
+                papers = get_paper_store().search(topic, max_results)
+            from_index = len(papers) >= max_results
+            if from_index:
+                get_background_executor().submit(refresh_index, topic, max_results)
+            else:
+                with st.spinner(f"🔍 Searching for papers on '{topic}'..."):
+                    papers = scrape_papers(topic, max_results)
+    session_results.set_papers((topic, max_results), papers, search_timings, matched_topics)
     
-    with st.spinner(f"🔍 Searching for papers on '{topic}'..."):
-        time.sleep(1)
-        papers = scrape_papers(topic, max_results)
+    if papers:
+        if matched_topics is not None:
+            st.success(
+                f"✅ Found {found} unique paper(s) across {len(topics) - len(errors)} topics, {shared} of them found by more "
+                f"than one topic" + (f"; showing the best-ranked {len(papers)}" if found > len(papers) else "")
+            )
+        elif from_index:
+            st.success(f"⚡ Found {len(papers)} paper(s) in the local index, refreshing from arXiv in the background")
+        else:
+            st.success(f"✅ Found {len(papers)} paper(s) matching your search!")
+
+if search_button and not topic:
+    st.warning("⚠️ Please enter a research topic to search for.")
+
+elif session_results.papers() is not None:
+    # The last search stays on screen through reruns from other widgets
+    papers = session_results.papers()
+    matched_topics = session_results.matched_topics()
+    if papers and not api_key:
+        st.warning("⚠️ Please enter your OpenRouter API key in the sidebar to generate AI summaries.")
     
     if papers:
-        st.success(f"✅ Found {len(papers)} paper(s) matching your search!")
-        
-        # Papers Section
-        st.markdown('<div class="results-container">', unsafe_allow_html=True)
-        
-        for i, paper in enumerate(papers, 1):
-            # Paper Card
-            st.markdown(f"""
-            <div class="paper-card">
-                <div class="paper-header">
-                    <div>
-                        <span style="color: #64748b; font-size: 0.9rem; font-weight: 500; text-transform: uppercase; letter-spacing: 0.05em;">Research Paper</span>
-                    </div>
-                    <div class="paper-number">#{i:02d}</div>
-                </div>
-                <h2 class="paper-title">{paper['title']}</h2>
-                <div class="paper-meta">
-                    <div class="paper-meta-icon">👥</div>
-                    <strong>Authors:</strong> {', '.join(paper['authors'][:3])}{'...' if len(paper['authors']) > 3 else ''}
-                </div>
-                <div class="paper-meta">
-                    <div class="paper-meta-icon">📅</div>
-                    <strong>Published:</strong> {paper['published']}
-                </div>
-                <div class="paper-meta">
-                    <div class="paper-meta-icon">🔗</div>
-                    <strong>ArXiv ID:</strong> {paper['arxiv_id'].split('/')[-1]}
-                </div>
-            """, unsafe_allow_html=True)
-            
-            # Content Grid
-            st.markdown('<div class="content-grid">', unsafe_allow_html=True)
-            
-            # Original Abstract
-            st.markdown(f"""
-            <div class="content-box abstract-box">
-                <div class="content-header">
-                    📄 Original Abstract
-                </div>
-                <div class="content-text">
-                    {paper['summary']}
-                </div>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            # AI Summary
-            if api_key:
-                with st.spinner("🤖 Generating AI analysis..."):
-                    summary = summarize_paper(
-                        paper['summary'], 
-                        instruction_prompt, 
-                        api_key, 
-                        selected_model
+        # Queue every summary that is neither kept from an earlier run, nor
+        # in the summary cache, nor waiting on demand. Jobs run in the
+        # background and each card polls its own, so a slow model never
+        # blocks the page.
+        jobs = {}
+        if api_key:
+            summary_keys = [summary_cache_key(paper.summary, instruction_prompt, selected_model) for paper in papers]
+            # Only sessions using the same API key share a job, so a bad key fails nobody else
+            job_keys = [f"{key}:{api_key_fingerprint(api_key)}" for key in summary_keys]
+            # A paper whose job is still in flight is answered by the job, not looked up again on every rerun
+            queued = get_summary_jobs().queued(job_keys)
+            for key, job_key in zip(summary_keys, job_keys):
+                if session_results.get_summary(key) is None and job_key not in queued:
+                    cached_summary = get_summary_cache().get(key)
+                    if cached_summary is not None:
+                        session_results.set_summary(key, cached_summary)
+            # A multi-topic search only summarizes its best-ranked papers up front
+            eager = 0 if lazy_summaries else MULTI_TOPIC_EAGER_SUMMARIES if matched_topics else len(papers)
+            pending = [
+                i for i, paper in enumerate(papers)
+                if session_results.get_summary(summary_keys[i]) is None
+                and (i < eager or session_results.is_requested(paper.arxiv_id))
+            ]
+            if pending:
+                plan = None
+                if summary_mode == "Batched":
+                    start = partial(
+                        summarize_papers_batched,
+                        instruction_prompt=instruction_prompt,
+                        api_key=api_key,
+                        model=selected_model,
+                        max_workers=1
                     )
-                
-                st.markdown(f"""
-                <div class="content-box summary-box">
-                    <div class="content-header">
-                        🤖 AI Analysis
-                    </div>
-                    <div class="content-text">
-                        {summary}
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            else:
-                st.markdown("""
-                <div class="content-box warning-box">
-                    <div class="content-header">
-                        ⚠️ API Key Required
-                    </div>
-                    <div class="content-text">
-                        <div style="text-align: center; padding: 2rem;">
-                            <div style="font-size: 3rem; margin-bottom: 1rem; color: #f59e0b;">🔐</div>
-                            <strong style="color: #374151; display: block; margin-bottom: 1rem;">API Key Required</strong>
-                            <span style="color: #6b7280;">Please add your OpenRouter API key in the sidebar to generate AI-powered summaries and analysis.</span>
-                        </div>
-                    </div>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            st.markdown('</div>', unsafe_allow_html=True)  # Close content-grid
-            st.markdown('</div>', unsafe_allow_html=True)  # Close paper-card
+                    plan = partial(plan_summary_batches, instruction_prompt=instruction_prompt, model=selected_model)
+                else:
+                    start = partial(
+                        summarize_papers_concurrently,
+                        instruction_prompt=instruction_prompt,
+                        api_key=api_key,
+                        model=selected_model,
+                        max_workers=1,
+                        stream=summary_mode == "Streaming",
+                        backup_model=get_usage_ledger().fastest_model(
+                            [model for model in model_options if model != selected_model]
+                        ) if hedge_requests else None,
+                        hedge_after=hedge_after
+                    )
+                jobs = dict(zip(pending, get_summary_jobs().submit(
+                    session_results.id,
+                    [job_keys[i] for i in pending],
+                    [papers[i] for i in pending],
+                    start,
+                    plan=plan,
+                    max_parallel=max_concurrency
+                )))
+        if not jobs:
+            # Nothing on the page is waiting, so let go of jobs from earlier searches and settings
+            get_summary_jobs().release(session_results.id)
         
-        st.markdown('</div>', unsafe_allow_html=True)  # Close results-container
+        # Papers Section: one element per card plus its analysis
+        with get_metrics().trace() as render_timings, get_metrics().timer('render_cards'):
+            for i, paper in enumerate(papers):
+                st.markdown(paper_card_html(i + 1, paper, matched_topics[i] if matched_topics else ()), unsafe_allow_html=True)
+                
+                # AI Summary (kept from an earlier run, polled from its job, or
+                # offered on demand)
+                if not api_key:
+                    st.markdown(load_assets()['api_key_warning'], unsafe_allow_html=True)
+                elif i in jobs:
+                    summary_job_box(jobs[i], summary_keys[i])
+                elif session_results.get_summary(summary_keys[i]) is not None:
+                    st.markdown(summary_box_html(session_results.get_summary(summary_keys[i])), unsafe_allow_html=True)
+                else:
+                    st.button(
+                        "✨ Generate AI Analysis",
+                        key=f"summarize_{paper.arxiv_id}",
+                        on_click=session_results.request,
+                        args=(papers.arxiv_id[i:i + 1 + LAZY_PREFETCH],)
+                    )
+        session_results.timings.update(render_timings)
+        get_metrics().inc('cards_rendered', len(papers))
     
     else:
+        get_summary_jobs().release(session_results.id)
         st.markdown("""
         <div class="empty-state">
             <div class="empty-state-icon">🔍</div>
@@ -781,9 +597,6 @@ if search_button and topic:
         </div>
         """, unsafe_allow_html=True)
 
-elif search_button and not topic:
-    st.warning("⚠️ Please enter a research topic to search for.")
-
 else:
     # Default empty state - only show when no search has been performed
     st.markdown("""
@@ -794,6 +607,31 @@ else:
     </div>
     """, unsafe_allow_html=True)
 
+# Bulk Harvest
+with st.sidebar.expander("🌙 Bulk Harvest"):
+    st.caption("Store every arXiv result for the search topic locally, without rendering them, to pre-warm the summary pipeline.")
+    harvest_total = st.number_input("Papers to Harvest", 100, HARVEST_MAX_RESULTS, 1000, step=100)
+    harvest_refresh = st.checkbox(
+        "Start Over",
+        help="Harvest from the first page again instead of resuming, to pick up papers submitted since the last harvest"
+    )
+    if st.button("Start Harvest", disabled=not topic or multi_topic):
+        progress_bar = st.progress(0.0)
+        try:
+            harvested = harvest_papers(
+                topic,
+                harvest_total,
+                get_paper_store(),
+                get_arxiv_client(),
+                checkpoint_path=harvest_checkpoint_path(topic),
+                progress=lambda done, total: progress_bar.progress(min(done / total, 1.0)),
+                refresh=harvest_refresh
+            )
+            st.success(f"✅ Harvested {harvested} paper(s) on '{topic}'")
+        except Exception as e:
+            st.error(f"Harvest interrupted, run it again to resume: {str(e)}")
+    st.caption(f"{get_paper_store().count()} papers in the local index")
+
 # Sidebar Instructions
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📋 Quick Start")
@@ -813,6 +651,108 @@ st.sidebar.markdown("""
 🔒 **Secure** - Safe API key handling  
 """)
 
+st.sidebar.markdown("### 📊 Performance")
+cache_stats = get_summary_cache().stats()
+st.sidebar.caption(
+    f"{cache_stats['entries']} cached summaries · "
+    f"{cache_stats['hits']} hits · {cache_stats['misses']} misses · "
+    f"{cache_stats['hit_rate']:.0%} hit rate"
+)
+
+search_cache_stats = get_search_cache().stats()
+st.sidebar.caption(
+    f"Search cache ({search_cache_stats['backend']}): "
+    + (f"{search_cache_stats['entries']} searches · " if search_cache_stats['entries'] is not None else "")
+    + f"{search_cache_stats['hits']} hits · {search_cache_stats['stale_hits']} served stale · "
+    f"{search_cache_stats['misses']} misses"
+    + (f" · {search_cache_stats['errors']} backend errors" if search_cache_stats['errors'] else "")
+)
+
+connection_stats = get_connection_tracker().stats()
+st.sidebar.caption(
+    f"OpenRouter: {connection_stats['requests']} requests · "
+    f"{connection_stats['reused_connections']} on reused connections"
+)
+
+arxiv_client = get_arxiv_client()
+st.sidebar.caption(
+    f"arXiv: {arxiv_client.requests} requests · "
+    f"{arxiv_client.not_modified} served as not modified"
+)
+
+job_stats = get_summary_jobs().stats()
+st.sidebar.caption(
+    f"Summary jobs: {job_stats['running']} running · "
+    f"{job_stats['submitted']} submitted · {job_stats['joined']} joined in flight · "
+    f"{job_stats['cancelled']} cancelled"
+)
+
+flight_stats = {name: flight.stats() for name, flight in get_single_flights().items()}
+st.sidebar.caption(
+    f"Coalesced: {flight_stats['search']['coalesced']} searches and "
+    f"{flight_stats['summary']['coalesced']} summary requests shared an identical call in flight"
+)
+
+for name, limiter in get_rate_limiters().items():
+    limiter_stats = limiter.stats()
+    st.sidebar.caption(
+        f"{name} rate limit: {limiter_stats['queue_depth']} waiting "
+        f"(max {limiter_stats['max_queue_depth']}) · {limiter_stats['delayed']}/{limiter_stats['acquired']} delayed · "
+        f"avg wait {limiter_stats['avg_wait']:.2f}s · max wait {limiter_stats['max_wait']:.2f}s"
+    )
+
+for name, breaker in get_circuit_breakers().items():
+    breaker_stats = breaker.stats()
+    state = breaker_stats['state'].replace('_', '-')
+    if breaker_stats['state'] == 'open':
+        state += f", retrying in {breaker_stats['retry_in']:.0f}s"
+    st.sidebar.caption(
+        f"{name} circuit: {state} · timeout {breaker_stats['timeout']:.1f}s"
+        + (f" · p95 {breaker_stats['p95']:.2f}s" if breaker_stats['p95'] is not None else "")
+        + (f" · replies p95 {breaker_stats['windows']['per_token'] * 1000:.1f}ms/token"
+           if breaker_stats['windows'].get('per_token') is not None else "")
+        + (f" · {breaker_stats['rejected']} failed fast" if breaker_stats['rejected'] else "")
+    )
+
+for model, usage in get_usage_ledger().stats().items():
+    # Models failing upstream are left out as hedging backups until their cool-down passes
+    unhealthy = "" if get_usage_ledger().is_healthy(model) else " · skipped as a backup"
+    if not usage['requests']:
+        st.sidebar.caption(f"{model}: {usage['errors']} failed requests{unhealthy}")
+        continue
+    st.sidebar.caption(
+        f"{model}: {usage['requests']} requests · "
+        f"{usage['prompt_tokens'] / usage['requests']:.0f} prompt + "
+        f"{usage['completion_tokens'] / usage['requests']:.0f} completion tokens · "
+        f"{usage['latency'] / usage['requests']:.1f}s avg"
+        + (f" · {usage['first_token']:.1f}s to first token" if usage['first_token'] is not None else "")
+        + (f" · {usage['errors']} failed" if usage['errors'] else "")
+        + unhealthy
+    )
+
+if hedge_requests:
+    st.sidebar.caption(
+        f"Hedging: {get_metrics().count('hedged_requests')} backup requests · "
+        f"{get_metrics().count('hedge_wins')} won by the backup"
+    )
+
+with st.sidebar.expander("🐞 Search Timings"):
+    if session_results.timings:
+        for stage, seconds in session_results.timings.items():
+            st.caption(f"{stage}: {seconds * 1000:.0f} ms")
+        finished = [timing for timing in session_results.summary_timings if timing[1] is not None]
+        if finished:
+            first_text = sorted(timing[0] for timing in finished if timing[0] is not None)
+            elapsed = sorted(timing[1] for timing in finished)
+            st.caption(
+                f"summaries: {len(finished)} · median first text "
+                f"{first_text[len(first_text) // 2] if first_text else 0:.2f}s · "
+                f"median total {elapsed[len(elapsed) // 2]:.2f}s"
+            )
+    else:
+        st.caption("Run a search to see where its time goes.")
+    st.caption(f"Prometheus metrics: {METRICS_FILE}" + (f" and :{METRICS_PORT}/metrics" if METRICS_PORT else ""))
+
 st.sidebar.markdown("### 💡 Pro Tips")
 st.sidebar.markdown("""
 • Use specific keywords for better results  
@@ -822,3 +762,8 @@ st.sidebar.markdown("""
 """)
 
 st.markdown('</div>', unsafe_allow_html=True)  # Close main-container
+
+# Metrics export
+if METRICS_PORT:
+    start_metrics_server(METRICS_PORT)
+get_metrics().write(METRICS_FILE)